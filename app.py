@@ -1,15 +1,18 @@
 import base64
 import datetime
+import hashlib
 import hmac
 import html as html_mod
 import json
 import re
 import time
 import tempfile
+import threading
 import requests
 import io
 import json
 from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 def inject_global_radio_button_css():
     """Render all Streamlit radio controls like full-width rectangle button groups.
@@ -386,6 +389,7 @@ def style_full_width_radio_tabs(
         unsafe_allow_html=True,
     )
 import jwt  # ✅ PyJWT
+from cryptography.hazmat.primitives import serialization
 import pandas as pd
 import requests
 import streamlit as st
@@ -393,6 +397,11 @@ import streamlit.components.v1 as components
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+try:
+    import orjson  # optional: much faster encode for large registry/bundle payloads
+except ImportError:
+    orjson = None
+
 # =========================================================
 # ✅ Final compact pill action buttons + no-dead-space rows
 # =========================================================
@@ -708,14 +717,24 @@ st.markdown(
 
 @st.cache_resource
 def http_session() -> requests.Session:
+    """Shared keep-alive session for every GitHub / Pages request.
+
+    One pooled connection set per process, so repeat calls to api.github.com
+    reuse the TCP+TLS handshake instead of reconnecting.
+    """
     s = requests.Session()
     retry = Retry(
         total=3,
         backoff_factor=0.4,
         status_forcelist=(429, 500, 502, 503, 504),
-        allowed_methods=("GET", "POST", "PUT", "DELETE"),
+        allowed_methods=("HEAD", "GET", "POST", "PUT", "DELETE"),
+        # Hand the last response back instead of raising RetryError, so the
+        # helpers' own status-code checks still produce readable errors.
+        raise_on_status=False,
     )
-    adapter = HTTPAdapter(max_retries=retry, pool_connections=20, pool_maxsize=20)
+    # Keep at least one warm connection per fan-out worker (GITHUB_MAX_WORKERS);
+    # past pool_maxsize urllib3 opens throwaway connections, each with a fresh TLS handshake.
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=20, pool_maxsize=max(20, GITHUB_MAX_WORKERS * 2))
     s.mount("https://", adapter)
     s.mount("http://", adapter)
     return s
@@ -1054,6 +1073,10 @@ def _estimate_header_line_count(columns, cfg: dict | None = None, df=None) -> in
     return max_lines
 
 
+_RE_HTML_TAG = re.compile(r"<[^>]+>")
+_RE_SPACE_RUN = re.compile(r"\s+")
+
+
 def _estimate_visible_row_heights_for_embed(df=None, visible_rows: int = 10, col_count: int = 0) -> int:
     """Estimate the rendered height of the first 10 visible rows.
 
@@ -1098,14 +1121,14 @@ def _estimate_visible_row_heights_for_embed(df=None, visible_rows: int = 10, col
         max_lines = 1
         for value in row.tolist():
             txt = "" if value is None else str(value)
-            txt = re.sub(r"<[^>]+>", " ", txt)
+            txt = _RE_HTML_TAG.sub(" ", txt)
             pieces = []
             for part in txt.replace("<br>", "\n").replace("<br/>", "\n").replace("<br />", "\n").splitlines():
-                part = re.sub(r"\s+", " ", part).strip()
+                part = _RE_SPACE_RUN.sub(" ", part).strip()
                 if part:
                     pieces.append(part)
             if not pieces:
-                pieces = [re.sub(r"\s+", " ", txt).strip()]
+                pieces = [_RE_SPACE_RUN.sub(" ", txt).strip()]
             line_count = 0
             for part in pieces:
                 if not part:
@@ -1352,6 +1375,9 @@ GITHUB_APP_SLUG = str(get_secret("GITHUB_APP_SLUG", "")).strip().lower()  # e.g.
 # PUBLISH_OWNER = "BetterCollective26"
 PUBLISH_OWNER = str(get_secret("PUBLISH_OWNER", "BetterCollective26")).strip().lower()
 
+# Admin passkey for deleting published tables
+ADMIN_DELETE_CODE = str(get_secret("ADMIN_DELETE_CODE", "") or "")
+
 # =========================================================
 # Repo Auto-Naming (Full Brand Name + Month + Year)
 # =========================================================
@@ -1380,24 +1406,42 @@ MONTH_CODE = {
 }
 
 
+# Published repos end in "t" + month letter + 2-digit year, e.g. "...tj26" (see _repo_suffix)
+_RE_MONTH_REPO_SUFFIX = re.compile(r"t[a-z]\d{2}$")
+
+
+def _repo_suffix(year: int, month: int) -> str:
+    """Month/year tail of a repo name, e.g. (2026, 1) -> "tj26"."""
+    return f"t{MONTH_CODE.get(month, 'x')}{str(year)[-2:]}"
+
+
 def suggested_repo_name(brand: str) -> str:
     b = (brand or "").strip()
     prefix = BRAND_REPO_PREFIX_FULL.get(b, "ActionNetwork")
-    now = datetime.datetime.utcnow()
-    mm = MONTH_CODE.get(now.month, "x")
-    yy = str(now.year)[-2:]
-    return f"{prefix}t{mm}{yy}"
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return prefix + _repo_suffix(now.year, now.month)
 
 
 # =========================================================
 # GitHub Helpers
 # =========================================================
+# Cap on concurrent api.github.com reads (stays well under the secondary rate limit).
+GITHUB_MAX_WORKERS = 8
+
+# (connect, read) seconds. A dead endpoint fails in 5 s instead of 20 s; writes get a
+# longer read window because GitHub can take a while to accept a large table commit.
+GITHUB_TIMEOUT = (5, 10)
+GITHUB_WRITE_TIMEOUT = (5, 30)
+
+
+_GITHUB_BASE_HEADERS = {"Accept": "application/vnd.github+json", "X-GitHub-Api-Version": "2022-11-28"}
+
+
 def github_headers(token: str) -> dict:
-    headers = {"Accept": "application/vnd.github+json"}
-    if token:
-        headers["Authorization"] = f"Bearer {token}"
-    headers["X-GitHub-Api-Version"] = "2022-11-28"
-    return headers
+    """Standard GitHub API headers. The no-token case returns the shared base dict: copy before mutating."""
+    if not token:
+        return _GITHUB_BASE_HEADERS
+    return {**_GITHUB_BASE_HEADERS, "Authorization": f"Bearer {token}"}
 
 
 def github_token(owner: str | None = None) -> str:
@@ -1414,69 +1458,188 @@ def github_token(owner: str | None = None) -> str:
     except Exception:
         return ""
 
+@st.cache_resource
+def github_app_jwt_cache() -> dict[str, tuple[str, int]]:
+    """app_id -> (jwt, exp epoch); reused until a minute before GitHub would reject it.
+
+    Held via cache_resource because Streamlit re-executes this module on every rerun.
+    """
+    return {}
+
+
+@st.cache_resource
+def github_app_jwt_lock() -> threading.Lock:
+    """Serializes re-signing so concurrent sessions/workers share one RS256 sign."""
+    return threading.Lock()
+
+
+@st.cache_resource
+def load_github_app_private_key(private_key_pem: str):
+    """Parse the App's PEM once per process; jwt.encode accepts the key object."""
+    return serialization.load_pem_private_key(private_key_pem.encode("utf-8"), password=None)
+
+
 def build_github_app_jwt(app_id: str, private_key_pem: str) -> str:
     """
     Create a short-lived JWT for GitHub App authentication.
+    The signed token is cached per app_id and reused while it is still valid.
     """
     if not app_id or not private_key_pem:
         raise RuntimeError("Missing GitHub App credentials in secrets (GITHUB_APP_ID / GITHUB_APP_PRIVATE_KEY).")
 
-    now = int(time.time())
-    payload = {
-        "iat": now - 30,  # helps with clock skew
-        "exp": now + (9 * 60),  # <= 10 mins
-        "iss": app_id,
-    }
+    jwt_cache = github_app_jwt_cache()
+    cached = jwt_cache.get(app_id)
+    if cached and int(time.time()) < cached[1] - 60:
+        return cached[0]
+
+    with github_app_jwt_lock():
+        # Another thread may have signed while we waited for the lock
+        now = int(time.time())
+        cached = jwt_cache.get(app_id)
+        if cached and now < cached[1] - 60:
+            return cached[0]
+
+        exp = now + (9 * 60)  # <= 10 mins
+        payload = {
+            "iat": now - 30,  # helps with clock skew
+            "exp": exp,
+            "iss": app_id,
+        }
+
+        try:
+            private_key = load_github_app_private_key(private_key_pem)
+        except (ValueError, TypeError) as e:
+            raise RuntimeError(f"Error loading GitHub App private key (GITHUB_APP_PRIVATE_KEY): {e}") from e
+
+        token = jwt.encode(payload, private_key, algorithm="RS256")
+        if isinstance(token, bytes):
+            token = token.decode("utf-8", errors="ignore")
+        jwt_cache[app_id] = (token, exp)
+        return token
+
+@st.cache_data(ttl=50 * 60, show_spinner=False)
+def get_app_installation_ids() -> dict[str, int]:
+    """
+    Map account login (lowercase) -> installation id for every install of this App.
+    One listing call covers users and orgs alike.
+    """
+    app_jwt = build_github_app_jwt(GITHUB_APP_ID, GITHUB_APP_PRIVATE_KEY)
+    headers = github_headers(app_jwt)
+
+    out = {}
+    page = 1
+    while True:
+        r = http_session().get(
+            "https://api.github.com/app/installations",
+            headers=headers,
+            params={"per_page": 100, "page": page},
+            timeout=GITHUB_TIMEOUT,
+        )
+        if r.status_code != 200:
+            raise RuntimeError(f"Error listing installations: {r.status_code} {r.text}")
+
+        batch = r.json() or []
+        for inst in batch:
+            login = str(((inst or {}).get("account") or {}).get("login", "") or "").strip().lower()
+            if login:
+                out[login] = int(inst.get("id", 0) or 0)
+
+        if len(batch) < 100:
+            break
+        page += 1
+
+        # safety stop
+        if page > 10:
+            break
+
+    return out
 
-    token = jwt.encode(payload, private_key_pem, algorithm="RS256")
-    if isinstance(token, bytes):
-        token = token.decode("utf-8", errors="ignore")
-    return token
 
 def get_installation_id_for_user(username: str) -> int:
     username = (username or "").strip()
     if not username:
         return 0
+    return _installation_id_or_zero(username.lower())
 
-    app_jwt = build_github_app_jwt(GITHUB_APP_ID, GITHUB_APP_PRIVATE_KEY)
 
-    # Try user install first
-    r = http_session().get(
-        f"https://api.github.com/users/{username}/installation",
-        headers=github_headers(app_jwt),
-        timeout=20,
-    )
-    if r.status_code == 200:
-        return int((r.json() or {}).get("id", 0) or 0)
+@st.cache_data(ttl=5 * 60, show_spinner=False)
+def _installation_id_or_zero(username: str) -> int:
+    """
+    0 when the App isn't installed on username. Remembered for 5 minutes only, so
+    repeat lookups skip the probes but a fresh install is picked up soon after.
+    """
+    try:
+        return _cached_installation_id(username)
+    except LookupError:
+        return 0
 
-    # If not found, try org install
-    r2 = http_session().get(
-        f"https://api.github.com/orgs/{username}/installation",
-        headers=github_headers(app_jwt),
-        timeout=20,
-    )
-    if r2.status_code == 200:
-        return int((r2.json() or {}).get("id", 0) or 0)
 
-    return 0
+@st.cache_data(ttl=24 * 60 * 60, show_spinner=False)
+def _cached_installation_id(username: str) -> int:
+    """
+    Installation ids only change on uninstall/reinstall, so cache them for a day.
+    "Not installed" raises LookupError instead of returning 0 so that it is never cached.
+    """
+    try:
+        install_id = get_app_installation_ids().get(username.lower(), 0)
+        if install_id:
+            return install_id
+    except Exception:
+        pass
+
+    # Fallback: ask GitHub about this account directly
+    app_jwt = build_github_app_jwt(GITHUB_APP_ID, GITHUB_APP_PRIVATE_KEY)
+    headers = github_headers(app_jwt)
+
+    def probe(kind: str) -> int:
+        r = http_session().get(
+            f"https://api.github.com/{kind}/{username}/installation",
+            headers=headers,
+            timeout=GITHUB_TIMEOUT,
+        )
+        if r.status_code == 200:
+            return int((r.json() or {}).get("id", 0) or 0)
+        return 0
+
+    # An account is either a user or an org, so fire both probes at once
+    # and take whichever one answers with an installation.
+    pool = ThreadPoolExecutor(max_workers=2)
+    try:
+        futures = [pool.submit(probe, kind) for kind in ("users", "orgs")]
+        for fut in as_completed(futures):
+            install_id = fut.result()
+            if install_id:
+                return install_id
+        raise LookupError(f"GitHub App is not installed on {username}")
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
 
 @st.cache_data(ttl=50 * 60)
 def get_installation_token_for_user(username: str) -> str:
     """
     Get an installation token for a user.
     Caches ~50 mins because token lifetime is ~1 hour.
+    Raises LookupError when the App isn't installed, so that is not cached for 50 mins.
     """
-    install_id = get_installation_id_for_user(username)
-    if not install_id:
-        return ""
+    for attempt in range(2):
+        install_id = get_installation_id_for_user(username)
+        if not install_id:
+            raise LookupError(f"GitHub App is not installed on {username}")
 
-    app_jwt = build_github_app_jwt(GITHUB_APP_ID, GITHUB_APP_PRIVATE_KEY)
+        app_jwt = build_github_app_jwt(GITHUB_APP_ID, GITHUB_APP_PRIVATE_KEY)
 
-    r = http_session().post(
-        f"https://api.github.com/app/installations/{install_id}/access_tokens",
-        headers=github_headers(app_jwt),
-        timeout=20,
-    )
+        r = http_session().post(
+            f"https://api.github.com/app/installations/{install_id}/access_tokens",
+            headers=github_headers(app_jwt),
+            timeout=GITHUB_WRITE_TIMEOUT,
+        )
+        if r.status_code == 404 and attempt == 0:
+            # Stale cached id (App uninstalled/reinstalled): forget it and look it up again
+            _cached_installation_id.clear()
+            _installation_id_or_zero.clear()
+            get_app_installation_ids.clear()
+            continue
+        break
 
     if r.status_code not in (200, 201):
         raise RuntimeError(f"Error creating installation token: {r.status_code} {r.text}")
@@ -1491,14 +1654,20 @@ def ensure_repo_exists(owner: str, repo: str, install_token: str) -> bool:
     owner = (owner or "").strip()
     repo = (repo or "").strip()
 
+    # Already confirmed earlier in this session → nothing to check
+    ensured = st.session_state.setdefault("_ensured_repos", set())
+    if (owner.lower(), repo.lower()) in ensured:
+        return False
+
     # First: check if repo exists (using GitHub App token)
     r = http_session().get(
         f"{api_base}/repos/{owner}/{repo}",
         headers=github_headers(install_token),
-        timeout=20,
+        timeout=GITHUB_TIMEOUT,
     )
 
     if r.status_code == 200:
+        ensured.add((owner.lower(), repo.lower()))
         return False  # already exists
 
     if r.status_code != 404:
@@ -1522,12 +1691,13 @@ def ensure_repo_exists(owner: str, repo: str, install_token: str) -> bool:
         create_url,
         headers=github_headers(GITHUB_PAT),
         json=payload,
-        timeout=20,
+        timeout=GITHUB_WRITE_TIMEOUT,
     )
 
     if r2.status_code not in (200, 201):
         raise RuntimeError(f"Error Creating Repo (PAT): {r2.status_code} {r2.text}")
 
+    ensured.add((owner.lower(), repo.lower()))
     return True
 
 
@@ -1535,8 +1705,15 @@ def ensure_pages_enabled(owner: str, repo: str, token: str, branch: str = "main"
     api_base = "https://api.github.com"
     headers = github_headers(token)
 
-    r = http_session().get(f"{api_base}/repos/{owner}/{repo}/pages", headers=headers, timeout=20)
+    # Pages already confirmed on in this session → skip the round-trip
+    pages_key = ((owner or "").strip().lower(), (repo or "").strip().lower())
+    pages_enabled = st.session_state.setdefault("_pages_enabled", set())
+    if pages_key in pages_enabled:
+        return
+
+    r = http_session().get(f"{api_base}/repos/{owner}/{repo}/pages", headers=headers, timeout=GITHUB_TIMEOUT)
     if r.status_code == 200:
+        pages_enabled.add(pages_key)
         return
     if r.status_code not in (404, 403):
         raise RuntimeError(f"Error Checking GitHub Pages: {r.status_code} {r.text}")
@@ -1544,9 +1721,10 @@ def ensure_pages_enabled(owner: str, repo: str, token: str, branch: str = "main"
         return
 
     payload = {"source": {"branch": branch, "path": "/"}}
-    r = http_session().post(f"{api_base}/repos/{owner}/{repo}/pages", headers=headers, json=payload, timeout=20)
+    r = http_session().post(f"{api_base}/repos/{owner}/{repo}/pages", headers=headers, json=payload, timeout=GITHUB_WRITE_TIMEOUT)
     if r.status_code not in (201, 202):
         raise RuntimeError(f"Error Enabling GitHub Pages: {r.status_code} {r.text}")
+    pages_enabled.add(pages_key)
 
 
 def upload_file_to_github(
@@ -1563,101 +1741,282 @@ def upload_file_to_github(
 
     path = (path or "").lstrip("/").strip()
     get_url = f"{api_base}/repos/{owner}/{repo}/contents/{path}"
-    r = http_session().get(get_url, headers=headers, params={"ref": branch}, timeout=20)
+    sha_key = (owner, repo, branch, path)
+    known_shas = st.session_state.setdefault("_file_sha", {})
+
+    def fetch_sha():
+        # Conditional GET: an unchanged file answers 304 with no body (no base64 content)
+        etag_key = ("sha", get_url, branch)
+        etag_cache = github_etag_cache()
+        cached = etag_cache.get(etag_key)
+        get_headers = {**headers, "If-None-Match": cached[0]} if cached else headers
+
+        r = http_session().get(get_url, headers=get_headers, params={"ref": branch}, timeout=GITHUB_TIMEOUT)
+        if r.status_code == 304 and cached:
+            return cached[1]
+        if r.status_code == 200:
+            sha = loads_json(r.content).get("sha")
+            if sha and r.headers.get("ETag"):
+                etag_cache[etag_key] = (r.headers["ETag"], sha)
+            return sha
+        etag_cache.pop(etag_key, None)
+        if r.status_code != 404:
+            raise RuntimeError(f"Error Checking File: {r.status_code} {r.text}")
+        return None
 
-    sha = None
-    if r.status_code == 200:
-        sha = r.json().get("sha")
-    elif r.status_code != 404:
-        raise RuntimeError(f"Error Checking File: {r.status_code} {r.text}")
+    # Re-uploads in this session reuse the sha our last PUT returned instead of GETting it again
+    sha = known_shas[sha_key] if sha_key in known_shas else fetch_sha()
 
-    encoded = base64.b64encode(content.encode("utf-8")).decode("utf-8")
+    encoded = base64.b64encode(content.encode("utf-8")).decode("ascii")  # base64 is pure ASCII
     payload = {"message": message, "content": encoded, "branch": branch}
     if sha:
         payload["sha"] = sha
 
-    r = http_session().put(get_url, headers=headers, json=payload, timeout=20)
+    r = http_session().put(get_url, headers=headers, json=payload, timeout=GITHUB_WRITE_TIMEOUT)
+    if r.status_code in (409, 422) and sha_key in known_shas:
+        # Remembered sha went stale (file changed elsewhere) → look it up once and retry
+        known_shas.pop(sha_key, None)
+        sha = fetch_sha()
+        payload.pop("sha", None)
+        if sha:
+            payload["sha"] = sha
+        r = http_session().put(get_url, headers=headers, json=payload, timeout=GITHUB_WRITE_TIMEOUT)
     if r.status_code not in (200, 201):
         raise RuntimeError(f"Error Uploading File: {r.status_code} {r.text}")
 
+    new_sha = ((r.json() or {}).get("content") or {}).get("sha")
+    if new_sha:
+        known_shas[sha_key] = new_sha
+
+
+def upload_files_to_github(
+    owner: str,
+    repo: str,
+    token: str,
+    files: list[tuple[str, str]],
+    message: str,
+    branch: str = "main",
+) -> None:
+    """
+    Write several (path, content) files as ONE commit via the Git Data API.
+
+    Costs five requests however many files there are (ref, commit, tree, commit, ref update),
+    instead of a GET + PUT per file through the Contents API.
+    """
+    files = [((path or "").lstrip("/").strip(), content) for path, content in (files or [])]
+    files = [(path, content) for path, content in files if path]
+    if not files:
+        return
+
+    # This commit moves these files on; drop any sha upload_file_to_github remembered for them
+    known_shas = st.session_state.setdefault("_file_sha", {})
+    for path, _ in files:
+        known_shas.pop((owner, repo, branch, path), None)
+
+    api_base = "https://api.github.com"
+    headers = github_headers(token)
+    git_base = f"{api_base}/repos/{owner}/{repo}/git"
+
+    # Inline "content" lets GitHub create the blobs itself, so no per-file blob POSTs.
+    tree = [{"path": path, "mode": "100644", "type": "blob", "content": content} for path, content in files]
+
+    # A second attempt only happens when another write moved the branch between our
+    # ref read and ref update (422 "not a fast forward"): rebuild on the new head.
+    for attempt in range(2):
+        r = http_session().get(f"{git_base}/ref/heads/{branch}", headers=headers, timeout=GITHUB_TIMEOUT)
+        if r.status_code in (404, 409):
+            # No branch yet (404) or an empty repo (409) → one file at a time via the Contents API
+            for path, content in files:
+                upload_file_to_github(owner, repo, token, path, content, message, branch=branch)
+            return
+        if r.status_code != 200:
+            raise RuntimeError(f"Error Reading Branch: {r.status_code} {r.text}")
+        base_commit_sha = ((r.json() or {}).get("object") or {}).get("sha", "")
+
+        r = http_session().get(f"{git_base}/commits/{base_commit_sha}", headers=headers, timeout=GITHUB_TIMEOUT)
+        if r.status_code != 200:
+            raise RuntimeError(f"Error Reading Commit: {r.status_code} {r.text}")
+        base_tree_sha = ((r.json() or {}).get("tree") or {}).get("sha", "")
+
+        r = http_session().post(
+            f"{git_base}/trees",
+            headers=headers,
+            json={"base_tree": base_tree_sha, "tree": tree},
+            timeout=GITHUB_WRITE_TIMEOUT,
+        )
+        if r.status_code != 201:
+            raise RuntimeError(f"Error Creating Tree: {r.status_code} {r.text}")
+        tree_sha = (r.json() or {}).get("sha", "")
+
+        r = http_session().post(
+            f"{git_base}/commits",
+            headers=headers,
+            json={"message": message, "tree": tree_sha, "parents": [base_commit_sha]},
+            timeout=GITHUB_WRITE_TIMEOUT,
+        )
+        if r.status_code != 201:
+            raise RuntimeError(f"Error Creating Commit: {r.status_code} {r.text}")
+        commit_sha = (r.json() or {}).get("sha", "")
+
+        r = http_session().patch(
+            f"{git_base}/refs/heads/{branch}",
+            headers=headers,
+            json={"sha": commit_sha},
+            timeout=GITHUB_WRITE_TIMEOUT,
+        )
+        if r.status_code == 200:
+            return
+        if r.status_code == 422 and attempt == 0:
+            continue
+        raise RuntimeError(f"Error Updating Branch: {r.status_code} {r.text}")
+
 
 def trigger_pages_build(owner: str, repo: str, token: str) -> bool:
     api_base = "https://api.github.com"
     headers = github_headers(token)
-    r = http_session().post(f"{api_base}/repos/{owner}/{repo}/pages/builds", headers=headers, timeout=20)
+    r = http_session().post(f"{api_base}/repos/{owner}/{repo}/pages/builds", headers=headers, timeout=GITHUB_WRITE_TIMEOUT)
     return r.status_code in (201, 202)
 
 
+@st.cache_resource
+def github_etag_cache() -> dict[tuple[str, str, str], tuple[str, bytes | str]]:
+    """(kind, url, ref) -> (ETag, what the caller kept from the body), shared across reruns and sessions.
+
+    Lets repeat GETs go out with If-None-Match: a 304 carries no body and does not
+    count against the primary rate limit.
+    """
+    return {}
+
+
 def github_file_exists(owner: str, repo: str, token: str, path: str, branch: str = "main") -> bool:
     """True if a file exists at path in repo."""
     try:
         api_base = "https://api.github.com"
-        headers = github_headers(token)
+        headers = dict(github_headers(token))
         path = (path or "").lstrip("/").strip()
         if not path:
             return False
         url = f"{api_base}/repos/{owner}/{repo}/contents/{path}"
-        r = http_session().get(url, headers=headers, params={"ref": branch}, timeout=20)
+        etag_key = ("exists", url, branch)
+        etag_cache = github_etag_cache()
+        cached = etag_cache.get(etag_key)
+        if cached:
+            headers["If-None-Match"] = cached[0]
+
+        # HEAD: only the status is needed, so skip the JSON body (and its base64 file content)
+        r = http_session().head(
+            url, headers=headers, params={"ref": branch}, timeout=GITHUB_TIMEOUT, allow_redirects=True
+        )
+        if r.status_code == 304:
+            return True
+        if r.status_code == 200 and r.headers.get("ETag"):
+            etag_cache[etag_key] = (r.headers["ETag"], b"")
         return r.status_code == 200
     except Exception:
         return False
 
+# The leading underscore keeps the token out of Streamlit's cache key: installation
+# tokens rotate hourly, and (owner, repo, path, branch) already identifies the file.
 @st.cache_data(ttl=120, show_spinner=False)
-def github_file_exists_cached(owner: str, repo: str, token: str, path: str, branch: str = "main") -> bool:
-    return github_file_exists(owner, repo, token, path, branch)
+def github_file_exists_cached(owner: str, repo: str, _token: str, path: str, branch: str = "main") -> bool:
+    return github_file_exists(owner, repo, _token, path, branch)
 
 
 @st.cache_data(ttl=120, show_spinner=False)
-def read_github_json_cached(owner: str, repo: str, token: str, path: str, branch: str = "main") -> dict:
-    return read_github_json(owner, repo, token, path, branch)
+def read_github_json_cached(owner: str, repo: str, _token: str, path: str, branch: str = "main") -> dict:
+    return read_github_json(owner, repo, _token, path, branch)
 
 def read_github_json(owner: str, repo: str, token: str, path: str, branch: str = "main") -> dict:
     """Read a JSON file from GitHub. If missing, return {}."""
     api_base = "https://api.github.com"
-    headers = github_headers(token)
+    headers = dict(github_headers(token))
     path = (path or "").lstrip("/").strip()
     if not path:
         return {}
 
     url = f"{api_base}/repos/{owner}/{repo}/contents/{path}"
-    r = http_session().get(url, headers=headers, params={"ref": branch}, timeout=20)
+    etag_key = ("json", url, branch)
+    etag_cache = github_etag_cache()
+    cached = etag_cache.get(etag_key)
+    if cached:
+        headers["If-None-Match"] = cached[0]
 
-    if r.status_code == 404:
-        return {}
-    if r.status_code != 200:
-        raise RuntimeError(f"Error reading JSON: {r.status_code} {r.text}")
+    r = http_session().get(url, headers=headers, params={"ref": branch}, timeout=GITHUB_TIMEOUT)
 
-    data = r.json() or {}
-    content_b64 = data.get("content", "")
-    if not content_b64:
-        return {}
+    if r.status_code == 304 and cached:
+        raw = cached[1]
+    else:
+        if r.status_code == 404:
+            etag_cache.pop(etag_key, None)
+            return {}
+        if r.status_code != 200:
+            raise RuntimeError(f"Error reading JSON: {r.status_code} {r.text}")
+
+        data = loads_json(r.content) or {}
+        content_b64 = data.get("content", "")
+        if not content_b64:
+            return {}
 
-    raw = base64.b64decode(content_b64).decode("utf-8", errors="ignore").strip()
-    if not raw:
+        # json.loads takes the decoded bytes directly; no intermediate str copy
+        raw = base64.b64decode(content_b64)
+        if r.headers.get("ETag"):
+            # keep the raw bytes (not the parsed dict) so callers always get a fresh object
+            etag_cache[etag_key] = (r.headers["ETag"], raw)
+
+    if not raw.strip():
         return {}
 
     try:
-        return json.loads(raw)
+        return loads_json(raw)
     except Exception:
         return {}
 
 
+def dumps_json_pretty(payload) -> str:
+    """Indented JSON text for files committed to GitHub (orjson when installed, stdlib otherwise)."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(payload, option=orjson.OPT_INDENT_2).decode("utf-8")
+        except TypeError:
+            pass  # non-str keys / exotic types: let the stdlib encoder handle (or report) them
+    return json.dumps(payload, indent=2, ensure_ascii=False)
+
+
+def loads_json(data: bytes | str):
+    """Parse JSON (orjson when installed). Falls back to the stdlib for what orjson rejects, e.g. NaN."""
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(data)
+
+
 def write_github_json(owner: str, repo: str, token: str, path: str, payload: dict, message: str, branch: str = "main") -> None:
     """Write a JSON file into GitHub."""
-    content = json.dumps(payload or {}, indent=2, ensure_ascii=False)
+    content = dumps_json_pretty(payload or {})
     upload_file_to_github(owner, repo, token, path, content, message, branch=branch)
 
+@st.cache_data(ttl=24 * 60 * 60, show_spinner=False)
+def get_github_owner_type(owner: str, _token: str) -> str:
+    """Return "User" / "Organization" for an account. Practically never changes, so cache for a day."""
+    r = http_session().get(f"https://api.github.com/users/{owner}", headers=github_headers(_token), timeout=GITHUB_TIMEOUT)
+    if r.status_code != 200:
+        # raise (not return "") so a transient failure is never cached
+        raise RuntimeError(f"Error looking up owner: {r.status_code} {r.text}")
+    return str((r.json() or {}).get("type", "") or "")
+
+
 def list_repos_for_owner(owner: str, token: str) -> list[dict]:
     api_base = "https://api.github.com"
     headers = github_headers(token)
 
     # detect if user/org
-    r = http_session().get(f"{api_base}/users/{owner}", headers=headers, timeout=20)
-    if r.status_code != 200:
+    try:
+        user_type = get_github_owner_type(owner, token)
+    except Exception:
         return []
 
-    user_type = (r.json() or {}).get("type", "")
-
     repos = []
     page = 1
     while True:
@@ -1666,7 +2025,7 @@ def list_repos_for_owner(owner: str, token: str) -> list[dict]:
         else:
             url = f"{api_base}/users/{owner}/repos"
 
-        rr = http_session().get(url, headers=headers, params={"per_page": 100, "page": page}, timeout=20)
+        rr = http_session().get(url, headers=headers, params={"per_page": 100, "page": page}, timeout=GITHUB_TIMEOUT)
         if rr.status_code != 200:
             break
 
@@ -1731,7 +2090,7 @@ def get_all_published_widgets(owner: str, token: str) -> pd.DataFrame:
             return False
 
         # must end with t + single-letter month code + 2-digit year (e.g., tj26)
-        return re.search(r"t[a-z]\d{2}$", rn) is not None
+        return _RE_MONTH_REPO_SUFFIX.search(rn) is not None
     def get_file_commit_meta(repo_name: str, file_name: str) -> tuple[str, str]:
         """
         Returns (created_by, created_utc) from latest commit touching the file.
@@ -1741,7 +2100,7 @@ def get_all_published_widgets(owner: str, token: str) -> pd.DataFrame:
                 f"{api_base}/repos/{owner}/{repo_name}/commits",
                 headers=headers,
                 params={"path": file_name, "per_page": 1},
-                timeout=20,
+                timeout=GITHUB_TIMEOUT,
             )
 
             if rr.status_code != 200:
@@ -1773,10 +2132,12 @@ def get_all_published_widgets(owner: str, token: str) -> pd.DataFrame:
         except Exception:
             return "", ""
 
-    for r in repos:
+    def rows_for_repo(r: dict) -> list[dict]:
         repo_name = (r.get("name") or "").strip()
         if not repo_name:
-            continue
+            return []
+
+        repo_rows = []
 
         try:
             reg = read_github_json_cached(owner, repo_name, token, "widget_registry.json", branch="main")
@@ -1813,7 +2174,7 @@ def get_all_published_widgets(owner: str, token: str) -> pd.DataFrame:
                         branch="main",
                     )
                     
-                    rows.append({
+                    repo_rows.append({
                         "Brand": brand,
                         "Table Name": meta.get("table_title", "") or fname,
                         "Has CSV": "✅" if has_csv else "—",
@@ -1830,7 +2191,7 @@ def get_all_published_widgets(owner: str, token: str) -> pd.DataFrame:
                     f"{api_base}/repos/{owner}/{repo_name}/contents",
                     headers=headers,
                     params={"ref": "main"},
-                    timeout=20,
+                    timeout=GITHUB_TIMEOUT,
                 )
 
                 if rr.status_code == 200:
@@ -1844,7 +2205,7 @@ def get_all_published_widgets(owner: str, token: str) -> pd.DataFrame:
 
                         created_by, created_utc = get_file_commit_meta(repo_name, name)
 
-                        rows.append({
+                        repo_rows.append({
                             "Brand": brand,
                             "Table Name": name,
                             "Has CSV": "—",  # ❌ legacy tables have no bundle
@@ -1855,7 +2216,14 @@ def get_all_published_widgets(owner: str, token: str) -> pd.DataFrame:
                             "File": name,
                         })
         except Exception:
-            continue
+            pass
+
+        return repo_rows
+
+    # Each repo is an independent set of reads, so fan them out; map() keeps repo order.
+    with ThreadPoolExecutor(max_workers=GITHUB_MAX_WORKERS) as pool:
+        for repo_rows in pool.map(rows_for_repo, repos):
+            rows.extend(repo_rows)
 
     df = pd.DataFrame(rows)
 
@@ -1879,6 +2247,17 @@ def get_all_published_widgets(owner: str, token: str) -> pd.DataFrame:
         # ✅ ALWAYS return a dataframe (even if empty)
     return df
    
+
+def clear_published_data_caches() -> None:
+    """
+    Drop cached repo contents after a refresh/delete.
+    App credentials (installation tokens/ids, owner types) are left alone: they are still
+    valid, and clearing them would force a fresh JWT sign + token exchange.
+    """
+    for fn in (get_all_published_widgets, read_github_json_cached, github_file_exists_cached, get_active_state_repo):
+        fn.clear()
+
+
 def update_widget_registry(
     owner: str,
     repo: str,
@@ -1924,6 +2303,7 @@ def update_widget_registry(
 ACTIVE_USERS_PATH = str(get_secret("ACTIVE_STATE_FILE_PATH", "active_users.json") or "active_users.json").strip()
 ACTIVE_USER_TTL_MINUTES = int(get_secret("ACTIVE_USER_TTL_MINUTES", 45) or 45)
 ACTIVE_USER_HEARTBEAT_SECONDS = int(get_secret("ACTIVE_USER_HEARTBEAT_SECONDS", 60) or 60)
+ACTIVE_STATE_REPO = str(get_secret("ACTIVE_STATE_REPO", "BrandedGeneratorState") or "BrandedGeneratorState").strip()
 
 def _is_generator_repo_name(repo_name: str) -> bool:
     """True if repo name matches our generator repo naming scheme."""
@@ -1939,7 +2319,7 @@ def _is_generator_repo_name(repo_name: str) -> bool:
         return False
 
     # end like: t + one month-letter + 2 digits year
-    return re.search(r"t[a-z]\d{2}$", low) is not None
+    return _RE_MONTH_REPO_SUFFIX.search(low) is not None
 
 
 @st.cache_data(ttl=300, show_spinner=False)
@@ -1950,7 +2330,7 @@ def get_active_state_repo(owner: str, token: str) -> str:
       1) secrets.ACTIVE_STATE_REPO (if set)
       2) lexicographically latest generator repo under the owner (fallback)
     """
-    preferred = str(get_secret("ACTIVE_STATE_REPO", "BrandedGeneratorState") or "BrandedGeneratorState").strip()
+    preferred = ACTIVE_STATE_REPO
     if preferred:
         return preferred
 
@@ -1980,7 +2360,7 @@ def active_state_repo_exists(owner: str, repo: str, token: str) -> bool:
         r = http_session().get(
             f"https://api.github.com/repos/{owner}/{repo}",
             headers=github_headers(token),
-            timeout=15,
+            timeout=GITHUB_TIMEOUT,
         )
         return r.status_code == 200
     except Exception:
@@ -2176,11 +2556,11 @@ def render_active_users_banner(owner: str, token: str):
 def get_github_file_sha(owner: str, repo: str, token: str, path: str, branch: str = "main") -> str:
     url = f"https://api.github.com/repos/{owner}/{repo}/contents/{path}"
     headers = {"Authorization": f"token {token}", "Accept": "application/vnd.github+json"}
-    r = http_session().get(url, headers=headers, params={"ref": branch}, timeout=15)
+    r = http_session().get(url, headers=headers, params={"ref": branch}, timeout=GITHUB_TIMEOUT)
     if r.status_code == 404:
         return ""  # already gone
     r.raise_for_status()
-    return (r.json() or {}).get("sha", "") or ""
+    return (loads_json(r.content) or {}).get("sha", "") or ""
 
 def delete_github_file(owner: str, repo: str, token: str, path: str, branch: str = "main"):
     sha = get_github_file_sha(owner, repo, token, path, branch=branch)
@@ -2194,7 +2574,7 @@ def delete_github_file(owner: str, repo: str, token: str, path: str, branch: str
         "sha": sha,
         "branch": branch,
     }
-    r = http_session().delete(url, headers=headers, json=payload, timeout=20)
+    r = http_session().delete(url, headers=headers, json=payload, timeout=GITHUB_WRITE_TIMEOUT)
     r.raise_for_status()
 
 def remove_from_widget_registry(owner: str, repo: str, token: str, widget_file_name: str, branch: str = "main"):
@@ -2211,63 +2591,166 @@ def remove_from_widget_registry(owner: str, repo: str, token: str, widget_file_n
             repo,
             token,
             registry_path,
-            json.dumps(registry, indent=2),
+            dumps_json_pretty(registry),
             f"Remove {widget_file_name} from widget_registry.json",
             branch=branch,
         )
 # =========================================================
 # Brand Metadata
 # =========================================================
-def get_brand_meta(brand: str) -> dict:
-    default_logo = "https://i.postimg.cc/x1nG117r/AN-final2-logo.png"
+BRAND_META = {
+    "Action Network": {
+        "name": "Action Network",
+        "logo_url": "https://i.postimg.cc/x1nG117r/AN-final2-logo.png",
+        "logo_alt": "Action Network Logo",
+        "brand_class": "brand-actionnetwork",
+    },
+    "VegasInsider": {
+        "name": "VegasInsider",
+        "logo_url": "https://i.postimg.cc/VkynWsGQ/VI-logo-Dark.png",
+        "logo_alt": "VegasInsider Logo",
+        "brand_class": "brand-vegasinsider",
+    },
+    "Canada Sports Betting": {
+        "name": "Canada Sports Betting",
+        "logo_url": "https://i.postimg.cc/25nqwgcw/csb-text-all-red.png",
+        "logo_alt": "Canada Sports Betting Logo",
+        "brand_class": "brand-canadasb",
+    },
+    "RotoGrinders": {
+        "name": "RotoGrinders",
+        "logo_url": "https://i.postimg.cc/PrcJnQtK/RG-logo-Fn.png",
+        "logo_alt": "RotoGrinders Logo",
+        "brand_class": "brand-rotogrinders",
+    },
+    "AceOdds": {
+        "name": "AceOdds",
+        "logo_url": "https://i.postimg.cc/RVhccmQc/aceodds-logo-original-1.png",
+        "logo_alt": "AceOdds Logo",
+        "brand_class": "brand-aceodds",
+    },
+    "BOLAVIP": {
+        "name": "BOLAVIP",
+        "logo_url": "https://i.postimg.cc/KzqsN24t/bolavip-logo-black.png",
+        "logo_alt": "BOLAVIP Logo",
+        "brand_class": "brand-bolavip",
+    },
+}
+
+
+# Per-brand CSS custom properties. Only the active brand's block is emitted into a page
+# ([[BRAND_PALETTE_CSS]]); Action Network uses the defaults on .vi-table-embed itself.
+BRAND_PALETTES = {
+    "brand-vegasinsider": {
+        "--brand-50": "#FFF7DC",
+        "--brand-100": "#FFE8AA",
+        "--brand-300": "#FFE08A",
+        "--brand-500": "#F2C23A",
+        "--brand-600": "#D9A72A",
+        "--brand-700": "#B9851A",
+        "--brand-900": "#111111",
+        "--brand-500-rgb": "242, 194, 58",
+        "--header-bg": "var(--brand-500)",
+        "--stripe": "var(--brand-50)",
+        "--hover": "var(--brand-100)",
+        "--scroll-thumb": "var(--brand-500)",
+        "--footer-border": "rgba(var(--brand-500-rgb), 0.40)",
+    },
+    "brand-bolavip": {
+        "--brand-50": "#FFF1F2",
+        "--brand-100": "#FFE1E4",
+        "--brand-300": "#FDA4AF",
+        "--brand-500": "#D81F30",
+        "--brand-600": "#BE1B2A",
+        "--brand-700": "#9F1622",
+        "--brand-900": "#5F0C12",
+        "--brand-500-rgb": "216, 31, 48",
+        "--header-bg": "var(--brand-600)",
+        "--stripe": "var(--brand-50)",
+        "--hover": "var(--brand-100)",
+        "--scroll-thumb": "var(--brand-600)",
+        "--footer-border": "rgba(var(--brand-500-rgb), 0.40)",
+    },
+    "brand-canadasb": {
+        "--brand-50": "#FEF2F2",
+        "--brand-100": "#FEE2E2",
+        "--brand-300": "#FECACA",
+        "--brand-500": "#EF4444",
+        "--brand-600": "#DC2626",
+        "--brand-700": "#B91C1C",
+        "--brand-900": "#7F1D1D",
+        "--brand-500-rgb": "239, 68, 68",
+        "--header-bg": "var(--brand-600)",
+        "--stripe": "var(--brand-50)",
+        "--hover": "var(--brand-100)",
+        "--scroll-thumb": "var(--brand-600)",
+        "--footer-border": "rgba(220, 38, 38, 0.40)",
+    },
+    "brand-rotogrinders": {
+        "--brand-50": "#E8F1FF",
+        "--brand-100": "#D3E3FF",
+        "--brand-300": "#9ABCF9",
+        "--brand-500": "#2F7DF3",
+        "--brand-600": "#0159D1",
+        "--brand-700": "#0141A1",
+        "--brand-900": "#011F54",
+        "--brand-500-rgb": "47, 125, 243",
+        "--header-bg": "var(--brand-700)",
+        "--stripe": "var(--brand-50)",
+        "--hover": "var(--brand-100)",
+        "--scroll-thumb": "var(--brand-600)",
+        "--footer-border": "rgba(1, 89, 209, 0.40)",
+    },
+    "brand-aceodds": {
+        "--brand-50": "#F1F3F7",
+        "--brand-100": "#D9DEE8",
+        "--brand-300": "#AEB8CB",
+        "--brand-500": "#364464",
+        "--brand-600": "#2E3A56",
+        "--brand-700": "#242E45",
+        "--brand-900": "#131A2B",
+        "--brand-500-rgb": "54, 68, 100",
+        "--header-bg": "var(--brand-600)",
+        "--stripe": "var(--brand-50)",
+        "--hover": "var(--brand-100)",
+        "--scroll-thumb": "var(--brand-600)",
+        "--footer-border": "rgba(var(--brand-500-rgb), 0.40)",
+    },
+}
+
+BRAND_PALETTE_CSS = {
+    brand_class: ".vi-table-embed.%s{%s}" % (brand_class, ";".join(f"{k}:{v}" for k, v in palette.items()))
+    for brand_class, palette in BRAND_PALETTES.items()
+}
+
+
+def get_brand_meta(brand: str) -> Mapping[str, str]:
+    """Brand name/logo/CSS class for a brand. Known brands return the shared BRAND_META entry: treat it as read-only."""
     brand_clean = (brand or "").strip() or "Action Network"
 
-    meta = {
+    known = BRAND_META.get(brand_clean)
+    if known is not None:
+        return known
+
+    # Unknown brand: Action Network styling under the given name
+    return {
         "name": brand_clean,
-        "logo_url": default_logo,
+        "logo_url": BRAND_META["Action Network"]["logo_url"],
         "logo_alt": f"{brand_clean} Logo",
         "brand_class": "brand-actionnetwork",
     }
 
-    if brand_clean == "Action Network":
-        meta["brand_class"] = "brand-actionnetwork"
-        meta["logo_url"] = "https://i.postimg.cc/x1nG117r/AN-final2-logo.png"
-        meta["logo_alt"] = "Action Network Logo"
-    elif brand_clean == "VegasInsider":
-        meta["brand_class"] = "brand-vegasinsider"
-        meta["logo_url"] = "https://i.postimg.cc/VkynWsGQ/VI-logo-Dark.png"
-        meta["logo_alt"] = "VegasInsider Logo"
-    elif brand_clean == "Canada Sports Betting":
-        meta["brand_class"] = "brand-canadasb"
-        meta["logo_url"] = "https://i.postimg.cc/25nqwgcw/csb-text-all-red.png"
-        meta["logo_alt"] = "Canada Sports Betting Logo"
-    elif brand_clean == "RotoGrinders":
-        meta["brand_class"] = "brand-rotogrinders"
-        meta["logo_url"] = "https://i.postimg.cc/PrcJnQtK/RG-logo-Fn.png"
-        meta["logo_alt"] = "RotoGrinders Logo"
-    elif brand_clean == "AceOdds":
-        meta["brand_class"] = "brand-aceodds"
-        meta["logo_url"] = "https://i.postimg.cc/RVhccmQc/aceodds-logo-original-1.png"
-        meta["logo_alt"] = "AceOdds Logo"
-    elif brand_clean == "BOLAVIP":
-        meta["brand_class"] = "brand-bolavip"
-        meta["logo_url"] = "https://i.postimg.cc/KzqsN24t/bolavip-logo-black.png"
-        meta["logo_alt"] = "BOLAVIP Logo"
-    return meta
-
 
 # =========================================================
 # HTML Template (UPDATED)
 # =========================================================
-HTML_TEMPLATE_TABLE = r"""<!-- BT_PUBLISH_HASH:bar_columns=[]|bar_fixed_w=200|bar_max_overrides={}|brand='Canada Sports Betting'|branded_title_color=True|cell_align='Center'|center_titles=False|col_header_overrides={}|header_wrap_target='Off'|header_wrap_words=2|embed_position='Header'|footer_logo_align='Center'|footer_logo_h=36|footer_notes=''|header_style='Keep original'|heat_columns=[]|heat_overrides={}|heat_strength=0.55|heatmap_style='Branded heatmap'|show_embed=True|show_footer=True|show_footer_notes=False|show_header=True|show_heat_scale=False|show_page_numbers=True|show_pager=True|show_search=True|striped=True|subtitle='Subheading'|subtitle_style='Keep original'|title='Table 1'|title_style='Keep original' -->
-<!DOCTYPE html>
+HTML_TEMPLATE_TABLE = r"""<!DOCTYPE html>
 
 <html lang="en">
 <head>
 <meta charset="utf-8"/>
 <meta content="width=device-width, initial-scale=1" name="viewport"/>
 <title>Table 1</title>
-<script src="https://cdn.jsdelivr.net/npm/html2canvas@1.4.1/dist/html2canvas.min.js"></script>
 </head>
 <body style="margin:0; overflow:hidden; background:transparent;">
 <section class="vi-table-embed [[BRAND_CLASS]] [[FOOTER_ALIGN_CLASS]] [[FOOTER_EMBED_MODE_CLASS]] [[CELL_ALIGN_CLASS]]" data-embed-position="[[EMBED_POSITION]]" style="width:100%;max-width:100%;margin:0;
@@ -2337,90 +2820,7 @@ HTML_TEMPLATE_TABLE = r"""<!-- BT_PUBLISH_HASH:bar_columns=[]|bar_fixed_w=200|ba
     .vi-table-embed.align-center { --cell-align:center; }
     .vi-table-embed.align-right { --cell-align:right; }
 
-    .vi-table-embed.brand-vegasinsider{
-      --brand-50:#FFF7DC;
-      --brand-100:#FFE8AA;
-      --brand-300:#FFE08A;
-      --brand-500:#F2C23A;
-      --brand-600:#D9A72A;
-      --brand-700:#B9851A;
-      --brand-900:#111111;
-      --brand-500-rgb: 242, 194, 58;
-
-      --header-bg:var(--brand-500);
-      --stripe:var(--brand-50);
-      --hover:var(--brand-100);
-      --scroll-thumb:var(--brand-500);
-      --footer-border: rgba(var(--brand-500-rgb), 0.40);
-    }
-
-    .vi-table-embed.brand-bolavip{
-      --brand-50:#FFF1F2;
-      --brand-100:#FFE1E4;
-      --brand-300:#FDA4AF;
-      --brand-500:#D81F30;
-      --brand-600:#BE1B2A;
-      --brand-700:#9F1622;
-      --brand-900:#5F0C12;
-      --brand-500-rgb: 216, 31, 48;
-
-      --header-bg:var(--brand-600);
-      --stripe:var(--brand-50);
-      --hover:var(--brand-100);
-      --scroll-thumb:var(--brand-600);
-      --footer-border: rgba(var(--brand-500-rgb), 0.40);
-    }
-
-    .vi-table-embed.brand-canadasb{
-      --brand-50:#FEF2F2;
-      --brand-100:#FEE2E2;
-      --brand-300:#FECACA;
-      --brand-500:#EF4444;
-      --brand-600:#DC2626;
-      --brand-700:#B91C1C;
-      --brand-900:#7F1D1D;
-      --brand-500-rgb: 239, 68, 68;
-
-      --header-bg:var(--brand-600);
-      --stripe:var(--brand-50);
-      --hover:var(--brand-100);
-      --scroll-thumb:var(--brand-600);
-      --footer-border: rgba(220, 38, 38, 0.40);
-    }
-
-    .vi-table-embed.brand-rotogrinders{
-      --brand-50:#E8F1FF;
-      --brand-100:#D3E3FF;
-      --brand-300:#9ABCF9;
-      --brand-500:#2F7DF3;
-      --brand-600:#0159D1;
-      --brand-700:#0141A1;
-      --brand-900:#011F54;
-      --brand-500-rgb: 47, 125, 243;
-
-      --header-bg:var(--brand-700);
-      --stripe:var(--brand-50);
-      --hover:var(--brand-100);
-      --scroll-thumb:var(--brand-600);
-      --footer-border: rgba(1, 89, 209, 0.40);
-    }
-
-    .vi-table-embed.brand-aceodds{
-      --brand-50:#F1F3F7;
-      --brand-100:#D9DEE8;
-      --brand-300:#AEB8CB;
-      --brand-500:#364464;
-      --brand-600:#2E3A56;
-      --brand-700:#242E45;
-      --brand-900:#131A2B;
-      --brand-500-rgb: 54, 68, 100;
-
-      --header-bg:var(--brand-600);
-      --stripe:var(--brand-50);
-      --hover:var(--brand-100);
-      --scroll-thumb:var(--brand-600);
-      --footer-border: rgba(var(--brand-500-rgb), 0.40);
-    }
+    [[BRAND_PALETTE_CSS]]
 
     /* Brand-safe flat tints for image/export footer/header areas */
     .vi-table-embed.brand-canadasb .vi-table-header,
@@ -3354,10 +3754,7 @@ HTML_TEMPLATE_TABLE = r"""<!-- BT_PUBLISH_HASH:bar_columns=[]|bar_fixed_w=200|ba
       max-width: 100%;
     }
 
-    /* zebra */
-    
-    #bt-block tbody tr:not(.dw-empty) td{ background:#ffffff; } /* base */
-    #bt-block tbody tr.dw-zebra-odd  td{ background:var(--row-stripe-bg); } /* striped */
+    /* zebra: base/striped/plain rules come from stripe_css_for() */
     [[STRIPE_CSS]]
 
 
@@ -3808,7 +4205,19 @@ HTML_TEMPLATE_TABLE = r"""<!-- BT_PUBLISH_HASH:bar_columns=[]|bar_fixed_w=200|ba
     const ALL_ROWS = tb ? Array.from(tb.rows).filter(r => !r.classList.contains('dw-empty')) : [];
     const PREVIEW_LIMIT = ALL_ROWS.length;     // full table
     const PREVIEW_ROWS = ALL_ROWS;             // full table
-    ALL_ROWS.forEach((r, i) => { r.dataset.idx = String(i); });
+    function indexRow(r, i){
+      r.dataset.idx = String(i);
+      // Search index: lowercased once here, so filtering never touches layout (innerText) per keystroke
+      // Cells are emitted with no whitespace between them, so join per cell to keep
+      // matches from spanning a cell boundary ("Team" + "12" must not match "m1")
+      r._lcText = Array.from(r.cells, td => td.textContent).join('\t').toLowerCase();
+      r._sortKeys = [];
+    }
+    ALL_ROWS.forEach(indexRow);
+    // Data rows in current tbody order; sortBy() replaces it, so nothing re-reads tb.rows per render
+    let orderedRows = ALL_ROWS.slice();
+    // Large tables ship rows past the first screenful in an inert <template>; see hydrateDeferredRows()
+    let deferredRows = tb ? tb.querySelector('template#bt-rows-deferred') : null;
     const scroller = root.querySelector('.dw-scroll');
     const topScroller = root.querySelector('.dw-top-scroll');
     const topScrollerInner = topScroller ? topScroller.querySelector('.dw-top-scroll-inner') : null;
@@ -4063,8 +4472,19 @@ HTML_TEMPLATE_TABLE = r"""<!-- BT_PUBLISH_HASH:bar_columns=[]|bar_fixed_w=200|ba
       window.__btResizeT = window.setTimeout(syncMeasuredScrollerHeight, 80);
     });
 
-    const onScrollShadow = ()=> scroller.classList.toggle('scrolled', scroller.scrollTop > 0);
-    scroller.addEventListener('scroll', onScrollShadow); onScrollShadow();
+    // At most one check per frame, and the class is only written when the state flips
+    let shadowFrame = 0;
+    let shadowOn = null;
+    const updateScrollShadow = ()=>{
+      shadowFrame = 0;
+      const want = scroller.scrollTop > 0;
+      if (want !== shadowOn){
+        shadowOn = want;
+        scroller.classList.toggle('scrolled', want);
+      }
+    };
+    const onScrollShadow = ()=>{ if (!shadowFrame) shadowFrame = requestAnimationFrame(updateScrollShadow); };
+    scroller.addEventListener('scroll', onScrollShadow, {passive:true}); updateScrollShadow();
 
     // Fallback for embedded iframes/WordPress/mobile browsers: keep wheel and
     // touch gestures attached to the actual table scroller, not the outer page.
@@ -4259,15 +4679,46 @@ HTML_TEMPLATE_TABLE = r"""<!-- BT_PUBLISH_HASH:bar_columns=[]|bar_fixed_w=200|ba
     applyBalancedHeaderWrap(table);
     applySmartHeaderWidths(table);
 
-    heads.forEach((th,i)=>{
+    heads.forEach(th=>{
       th.classList.add('sortable'); th.setAttribute('aria-sort','none'); th.dataset.sort='none'; th.tabIndex=0;
-      const type = th.dataset.type || 'text';
-      const go = ()=> sortBy(i,type,th);
-      th.addEventListener('click',go);
-      th.addEventListener('keydown',e=>{ if(e.key==='Enter'||e.key===' '){ e.preventDefault(); go(); } });
     });
 
-    function textOf(tr,i){ return (tr.children[i].innerText||'').trim(); }
+    // One delegated listener pair on <thead> instead of two closures per column
+    function sortFromHeaderEvent(e){
+      const th = e.target.closest('th');
+      const i = th ? heads.indexOf(th) : -1;
+      if (i === -1) return false;
+      sortBy(i, th.dataset.type || 'text', th);
+      return true;
+    }
+    table.tHead.addEventListener('click', sortFromHeaderEvent);
+    table.tHead.addEventListener('keydown', e=>{
+      if ((e.key === 'Enter' || e.key === ' ') && sortFromHeaderEvent(e)) e.preventDefault();
+    });
+
+    function textOf(tr,i){ return (tr.children[i].textContent||'').replace(/\s+/g,' ').trim(); }
+
+    // Parsed once per row/column on the first sort of that column, so the comparator never runs regex/parse.
+    function sortKeyOf(tr, colIdx, isNum){
+      let k = tr._sortKeys[colIdx];
+      if(k === undefined){
+        const raw = textOf(tr, colIdx);
+        if(isNum){
+          k = parseFloat(raw.replace(/[^0-9.\-]/g,''));
+          if(Number.isNaN(k)) k = -Infinity;
+        }else{
+          k = raw.toLowerCase();
+        }
+        tr._sortKeys[colIdx] = k;
+      }
+      return k;
+    }
+
+    function reinsertRows(rows){
+      const frag = document.createDocumentFragment();
+      rows.forEach(r => frag.appendChild(r));
+      tb.insertBefore(frag, emptyRow);
+    }
 
     function sortBy(colIdx, type, th){
       // ✅ sort against FULL dataset (not current page only)
@@ -4285,7 +4736,9 @@ HTML_TEMPLATE_TABLE = r"""<!-- BT_PUBLISH_HASH:bar_columns=[]|bar_fixed_w=200|ba
       // reset to original order
       if(next === 'none'){
         rows.sort((a,b)=>(+a.dataset.idx)-(+b.dataset.idx));
-        rows.forEach(r=>tb.insertBefore(r, emptyRow));
+        reinsertRows(rows);
+        orderedRows = rows;
+        lastMatch = null;
         page = 1;
         renderPage();
         return;
@@ -4297,30 +4750,20 @@ HTML_TEMPLATE_TABLE = r"""<!-- BT_PUBLISH_HASH:bar_columns=[]|bar_fixed_w=200|ba
     
       const mul = next === 'asc' ? 1 : -1;
     
-      rows.sort((a,b)=>{
-        let v1 = textOf(a,colIdx);
-        let v2 = textOf(b,colIdx);
-    
-        // force numeric on rank-like columns too
-        const isNum = (type || 'text') === 'num';
-    
-        if(isNum){
-          v1 = parseFloat(String(v1).replace(/[^0-9.\-]/g,''));
-          v2 = parseFloat(String(v2).replace(/[^0-9.\-]/g,''));
-          if(Number.isNaN(v1)) v1 = -Infinity;
-          if(Number.isNaN(v2)) v2 = -Infinity;
-        }else{
-          v1 = String(v1).toLowerCase();
-          v2 = String(v2).toLowerCase();
-        }
+      // force numeric on rank-like columns too
+      const isNum = (type || 'text') === 'num';
+      rows.forEach(r => sortKeyOf(r, colIdx, isNum));
     
-        if(v1 > v2) return 1 * mul;
-        if(v1 < v2) return -1 * mul;
-        return 0;
+      rows.sort((a,b)=>{
+        const v1 = a._sortKeys[colIdx];
+        const v2 = b._sortKeys[colIdx];
+        return v1 > v2 ? mul : v1 < v2 ? -mul : 0;
       });
     
-      // write sorted order back to tbody
-      rows.forEach(r=>tb.insertBefore(r, emptyRow));
+      // write sorted order back to tbody: one insertion of a fragment, not one move per row
+      reinsertRows(rows);
+      orderedRows = rows;
+      lastMatch = null;
     
       // ✅ always go to page 1 after sort
       page = 1;
@@ -4330,7 +4773,7 @@ HTML_TEMPLATE_TABLE = r"""<!-- BT_PUBLISH_HASH:bar_columns=[]|bar_fixed_w=200|ba
     function matchesFilter(tr){
       if(tr.classList.contains('dw-empty')) return false;
       if(!filter) return true;
-      return tr.innerText.toLowerCase().includes(filter);
+      return tr._lcText.indexOf(filter) !== -1;
     }
 
     function setPageStatus(totalVisible, pages){
@@ -4340,13 +4783,12 @@ HTML_TEMPLATE_TABLE = r"""<!-- BT_PUBLISH_HASH:bar_columns=[]|bar_fixed_w=200|ba
       pageStatus.textContent = "Page " + page + " Of " + pages;
     }
 
-    function applyVisibleZebra() {
-      const rows = Array.from(tb.rows)
-        .filter(tr => !tr.classList.contains('dw-empty') && tr.style.display !== 'none');
-    
-      rows.forEach((tr, i) => {
-        tr.classList.remove('dw-zebra-even', 'dw-zebra-odd');
-        tr.classList.add(i % 2 === 0 ? 'dw-zebra-odd' : 'dw-zebra-even');
+    // `shown` is already the visible rows in DOM order (renderPage builds it from orderedRows)
+    function applyVisibleZebra(shown) {
+      shown.forEach((tr, i) => {
+        const odd = i % 2 === 0;
+        tr.classList.toggle('dw-zebra-odd', odd);
+        tr.classList.toggle('dw-zebra-even', !odd);
       });
     }
 
@@ -4374,17 +4816,39 @@ HTML_TEMPLATE_TABLE = r"""<!-- BT_PUBLISH_HASH:bar_columns=[]|bar_fixed_w=200|ba
       });
     }
 
+    // Show exactly `shown`, hide every other row. Each row's display is written once, and only
+    // when it actually changes, so paging/filtering does not invalidate style on untouched rows.
+    function setShownRows(shown){
+      const keep = new Set(shown);
+      ALL_ROWS.forEach(r => {
+        const want = keep.has(r) ? 'table-row' : 'none';
+        if (r.style.display !== want) r.style.display = want;
+      });
+    }
+
+    // Rows (in current DOM order) matching the last filter. Typing one more character can only
+    // narrow the match, so the next scan starts from these rows instead of the whole table.
+    // Paging reuses the result as-is; sortBy() drops it because the row order changes.
+    let lastMatch = null;
+
+    function filteredRows(){
+      if (lastMatch && lastMatch.filter === filter) return lastMatch.rows;
+      const base = (lastMatch && filter.startsWith(lastMatch.filter))
+        ? lastMatch.rows
+        // Always operate on CURRENT DOM order (after sortBy re-inserts rows)
+        : orderedRows;
+      const rows = filter ? base.filter(matchesFilter) : base;
+      lastMatch = { filter, rows };
+      return rows;
+    }
+
     function renderPage(){
-      // Always operate on CURRENT DOM order (after sortBy re-inserts rows)
-      const ordered = Array.from(tb.rows).filter(r => !r.classList.contains('dw-empty'));
-      const visible = ordered.filter(matchesFilter);
+      const visible = filteredRows();
       const total = visible.length;
     
-      // hide all real rows first
-      ALL_ROWS.forEach(r => { r.style.display = 'none'; });
-    
       let shown = [];
       if (total === 0){
+        setShownRows(shown);
         if (emptyRow){
           emptyRow.style.display = 'table-row';
           if (emptyRow.firstElementChild) emptyRow.firstElementChild.colSpan = heads.length;
@@ -4394,7 +4858,7 @@ HTML_TEMPLATE_TABLE = r"""<!-- BT_PUBLISH_HASH:bar_columns=[]|bar_fixed_w=200|ba
           nextBtn.disabled = true;
         }
         setPageStatus(0, 0);
-        applyVisibleZebra();
+        applyVisibleZebra(shown);
         syncMenuOptions();
         requestAnimationFrame(syncMeasuredScrollerHeight);
         scheduleStreamlitFrameHeight();
@@ -4406,7 +4870,7 @@ HTML_TEMPLATE_TABLE = r"""<!-- BT_PUBLISH_HASH:bar_columns=[]|bar_fixed_w=200|ba
       if (!hasPager || pageSize === 0){
         // show all filtered rows
         shown = visible;
-        shown.forEach(r => { r.style.display = 'table-row'; });
+        setShownRows(shown);
         if (hasPager){
           prevBtn.disabled = true;
           nextBtn.disabled = true;
@@ -4421,7 +4885,7 @@ HTML_TEMPLATE_TABLE = r"""<!-- BT_PUBLISH_HASH:bar_columns=[]|bar_fixed_w=200|ba
         const end = start + pageSize;
         shown = visible.slice(start, end);
     
-        shown.forEach(r => { r.style.display = 'table-row'; });
+        setShownRows(shown);
     
         prevBtn.disabled = page <= 1;
         nextBtn.disabled = page >= pages;
@@ -4429,24 +4893,55 @@ HTML_TEMPLATE_TABLE = r"""<!-- BT_PUBLISH_HASH:bar_columns=[]|bar_fixed_w=200|ba
       }
     
       if (scroller) scroller.scrollTop = 0;
-      applyVisibleZebra();
+      applyVisibleZebra(shown);
       syncMenuOptions();
       requestAnimationFrame(syncMeasuredScrollerHeight);
       scheduleStreamlitFrameHeight();
     }
 
+    // Move the deferred rows into the table. Runs once: when the browser is idle after first
+    // paint, or earlier on the first interaction, so search/sort/paging/exports see every row.
+    function hydrateDeferredRows(){
+      if (!deferredRows) return;
+      const tpl = deferredRows;
+      deferredRows = null;
+      HYDRATE_EVENTS.forEach(type => hydrateScope.removeEventListener(type, hydrateDeferredRows, true));
+
+      const frag = tpl.content;
+      Array.from(frag.children).forEach(r => {
+        indexRow(r, ALL_ROWS.length);
+        ALL_ROWS.push(r);
+        orderedRows.push(r);
+      });
+      tb.insertBefore(frag, emptyRow || tpl);
+      tpl.remove();
+
+      lastMatch = null;
+      const scrollTop = scroller.scrollTop;
+      renderPage();
+      scroller.scrollTop = scrollTop;
+    }
+
+    const HYDRATE_EVENTS = ['pointerdown', 'keydown', 'focusin'];
+    const hydrateScope = widgetRoot || root;
+
     if(hasSearch){
       const syncClearBtn = ()=> searchFieldWrap.classList.toggle('has-value', !!searchInput.value);
       let t=null;
+      let frame=0;
     
       searchInput.addEventListener('input', e=>{
         syncClearBtn();
         clearTimeout(t);
+        cancelAnimationFrame(frame);
         t=setTimeout(()=>{
-          filter=(e.target.value||'').toLowerCase().trim();
-          page=1;
-          renderPage();
-          syncMenuOptions();
+          // at most one filter render per frame, however fast the typing
+          frame=requestAnimationFrame(()=>{
+            filter=(searchInput.value||'').toLowerCase().trim();
+            page=1;
+            renderPage();
+            syncMenuOptions();
+          });
         },120);
       });
     
@@ -4523,8 +5018,28 @@ HTML_TEMPLATE_TABLE = r"""<!-- BT_PUBLISH_HASH:bar_columns=[]|bar_fixed_w=200|ba
       }
     }
 
+    // html2canvas is only needed for PNG downloads, so it is fetched on first use instead of
+    // blocking page load. Opening the menu starts the fetch, so it is usually ready by the click.
+    const HTML2CANVAS_SRC = 'https://cdn.jsdelivr.net/npm/html2canvas@1.4.1/dist/html2canvas.min.js';
+    let html2canvasLoading = null;
+    function loadHtml2Canvas(){
+      if(window.html2canvas) return Promise.resolve(window.html2canvas);
+      if(!html2canvasLoading){
+        html2canvasLoading = new Promise((resolve, reject)=>{
+          const s = document.createElement('script');
+          s.src = HTML2CANVAS_SRC;
+          s.async = true;
+          s.onload = ()=> window.html2canvas ? resolve(window.html2canvas) : reject(new Error('html2canvas missing after load'));
+          s.onerror = ()=>{ html2canvasLoading = null; s.remove(); reject(new Error('html2canvas failed to load')); };
+          document.head.appendChild(s);
+        });
+      }
+      return html2canvasLoading;
+    }
+
     function showMenu(anchor){
       if(!modal) return;
+      loadHtml2Canvas().catch(()=>{});
       lastTrigger = anchor || lastTrigger;
       modal.classList.remove('vi-hide');
       modal.setAttribute('aria-hidden','false');
@@ -4607,6 +5122,16 @@ HTML_TEMPLATE_TABLE = r"""<!-- BT_PUBLISH_HASH:bar_columns=[]|bar_fixed_w=200|ba
       return s;
     }
 
+    // CSV line per row, built once from textContent (no layout) and reused by both exports
+    function csvLineOf(tr){
+      if (tr._csvLine === undefined){
+        tr._csvLine = Array.from(tr.cells)
+          .map(td => escapeCsvCell((td.textContent || "").replace(/\s+/g, " ")))
+          .join(",");
+      }
+      return tr._csvLine;
+    }
+
     function downloadCsv(){
       try{
         hideMenu();
@@ -4619,13 +5144,7 @@ HTML_TEMPLATE_TABLE = r"""<!-- BT_PUBLISH_HASH:bar_columns=[]|bar_fixed_w=200|ba
 
         const lines = [headerLine];
 
-        filteredRows.forEach(tr => {
-          const cells = Array.from(tr.cells).map(td => {
-            const txt = td.innerText || td.textContent || "";
-            return escapeCsvCell(txt);
-          });
-          lines.push(cells.join(","));
-        });
+        filteredRows.forEach(tr => lines.push(csvLineOf(tr)));
 
         const csv = lines.join("\n");
         const blob = new Blob([csv], { type: "text/csv;charset=utf-8;" });
@@ -4655,10 +5174,7 @@ HTML_TEMPLATE_TABLE = r"""<!-- BT_PUBLISH_HASH:bar_columns=[]|bar_fixed_w=200|ba
       const rows = Array.from(tb.rows).filter(r => !r.classList.contains('dw-empty'));
       const visibleRows = rows.filter(r => matchesFilter(r) && r.style.display !== 'none');
     
-      visibleRows.forEach(tr => {
-        const cells = Array.from(tr.cells).map(td => escapeCsvCell(td.innerText || td.textContent || ""));
-        lines.push(cells.join(","));
-      });
+      visibleRows.forEach(tr => lines.push(csvLineOf(tr)));
     
       const csv = lines.join("\n");
       const blob = new Blob([csv], { type: "text/csv;charset=utf-8;" });
@@ -4681,8 +5197,7 @@ HTML_TEMPLATE_TABLE = r"""<!-- BT_PUBLISH_HASH:bar_columns=[]|bar_fixed_w=200|ba
       const keep = new Set();
 
       // ✅ Use CURRENT live DOM order (respects sorting), but never filter
-      const liveRowsInOrder = Array.from(tb.rows).filter(r => !r.classList.contains('dw-empty'));
-      const orderedIdx = liveRowsInOrder.map(r => String(r.dataset.idx));
+      const orderedIdx = orderedRows.map(r => String(r.dataset.idx));
 
       if (mode === 'top10'){
         orderedIdx.slice(0, 10).forEach(id => keep.add(id));
@@ -4698,15 +5213,20 @@ HTML_TEMPLATE_TABLE = r"""<!-- BT_PUBLISH_HASH:bar_columns=[]|bar_fixed_w=200|ba
         PREVIEW_ROWS.forEach(r => keep.add(String(r.dataset.idx)));
       }
 
-      // Show/hide clone rows by idx
+      // ✅ Drop clone rows we don't keep (not just display:none) so html2canvas
+      // doesn't re-clone and walk every hidden row for a 10-row image.
+      const vis = [];
       cloneRows.forEach(r => {
-        const on = keep.has(String(r.dataset.idx));
-        r.style.display = on ? 'table-row' : 'none';
+        if (!keep.has(String(r.dataset.idx))){
+          r.remove();
+          return;
+        }
+        r.style.display = 'table-row';
         r.classList.remove('dw-zebra-odd', 'dw-zebra-even');
+        vis.push(r);
       });
 
       // Re-zebra visible rows
-      const vis = cloneRows.filter(r => r.style.display !== 'none');
       vis.forEach((r, i) => {
         r.classList.add(i % 2 === 0 ? 'dw-zebra-odd' : 'dw-zebra-even');
       });
@@ -4782,12 +5302,18 @@ HTML_TEMPLATE_TABLE = r"""<!-- BT_PUBLISH_HASH:bar_columns=[]|bar_fixed_w=200|ba
 
       const scale = Math.min(3, Math.max(2, window.devicePixelRatio || 2));
 
+      // ✅ html2canvas clones the whole document before rendering; skip the live
+      // widget (only the staged export clone is captured).
+      const liveWidget = Array.from(document.querySelectorAll('section.vi-table-embed'))
+        .find(el => !stage.contains(el));
+
       const canvas = await window.html2canvas(clone, {
         backgroundColor: '#ffffff',
         scale,
         useCORS: true,
         allowTaint: true,
         logging: false,
+        ignoreElements: (el) => el === liveWidget,
         width: Math.ceil(w),
         height: Math.ceil(fullH),
         windowWidth: Math.ceil(w),
@@ -4822,7 +5348,12 @@ HTML_TEMPLATE_TABLE = r"""<!-- BT_PUBLISH_HASH:bar_columns=[]|bar_fixed_w=200|ba
     async function downloadDomPng(mode){
       try{
         hideMenu();
-        if(!window.html2canvas) return;
+        try{
+          await loadHtml2Canvas();
+        }catch(err){
+          console.warn("PNG export unavailable:", err);
+          return;
+        }
 
         const widget = document.querySelector('section.vi-table-embed');
         if(!widget) return;
@@ -5278,6 +5809,13 @@ HTML_TEMPLATE_TABLE = r"""<!-- BT_PUBLISH_HASH:bar_columns=[]|bar_fixed_w=200|ba
     syncMenuOptions();
     syncMeasuredScrollerHeight();
     scheduleStreamlitFrameHeight();
+
+    if (deferredRows){
+      // capture phase: rows are in place before any widget handler runs
+      HYDRATE_EVENTS.forEach(type => hydrateScope.addEventListener(type, hydrateDeferredRows, true));
+      if (window.requestIdleCallback) requestIdleCallback(hydrateDeferredRows, { timeout: 1500 });
+      else setTimeout(hydrateDeferredRows, 200);
+    }
   })();
   </script>
 </section>
@@ -5286,25 +5824,151 @@ HTML_TEMPLATE_TABLE = r"""<!-- BT_PUBLISH_HASH:bar_columns=[]|bar_fixed_w=200|ba
 
 """
 
+_STYLE_BLOCK_RE = re.compile(r"(<style[^>]*>)(.*?)(</style>)", re.S)
+_CSS_COMMENT_RE = re.compile(r"/\*.*?\*/", re.S)
+_CSS_SPACE_RE = re.compile(r"\s+")
+# "+" / "-" are left alone: calc() needs the spaces around them.
+_CSS_PUNCT_SPACE_RE = re.compile(r"\s*([{};,>])\s*")
+
+
+def minify_css(css: str) -> str:
+    """Strip comments and layout whitespace from a stylesheet (no selector/value rewriting)."""
+    css = _CSS_COMMENT_RE.sub("", css)
+    css = _CSS_SPACE_RE.sub(" ", css)
+    css = _CSS_PUNCT_SPACE_RE.sub(r"\1", css)
+    css = css.replace(": ", ":").replace(";}", "}")
+    return css.strip()
+
+
+_SCRIPT_BLOCK_RE = re.compile(r"(<script>)(.*?)(</script>)", re.S)
+
+
+def minify_js(js: str) -> str:
+    """
+    Drop indentation, blank lines and whole-line // comments from a script.
+    Line breaks are kept (so ASI behaves exactly as before) and lines inside a
+    multi-line `template literal` are left byte-for-byte as written.
+    """
+    out = []
+    in_template = False
+    for line in js.split("\n"):
+        toggles = (line.count("`") - line.count("\\`")) % 2 == 1
+        if in_template:
+            out.append(line)
+        else:
+            stripped = line.strip()
+            if not stripped or stripped.startswith("//"):
+                continue
+            # a line that opens a literal keeps its trailing text: it belongs to the literal
+            out.append(line.lstrip() if toggles else stripped)
+        if toggles:
+            in_template = not in_template
+    return "\n".join(out)
+
+
+# [[NAME]] placeholders in the template: split() leaves literal text at even indexes,
+# placeholder names at odd ones.
+_TEMPLATE_TOKEN_RE = re.compile(r"\[\[([A-Z_0-9]+)\]\]")
+
+
+def _compile_table_template(template: str):
+    """
+    Build `_render(TITLE=..., TABLE_ROWS=..., ...)` whose body is one f-string over the
+    pre-split pieces, so a render is a single BUILD_STRING. Literal segments are passed in
+    through the namespace (never pasted into source), so the template needs no escaping.
+    Placeholders that are not supplied render as their original [[NAME]] text.
+    """
+    parts = _TEMPLATE_TOKEN_RE.split(template)
+    literals = parts[0::2]
+    keys = parts[1::2]
+    ns = {f"_lit{i}": lit for i, lit in enumerate(literals)}
+    names = list(dict.fromkeys(keys))
+    params = ", ".join(f'{name}="[[{name}]]"' for name in names)
+    body = "".join(f"{{_lit{i}}}{{{key}}}" for i, key in enumerate(keys))
+    body += f"{{_lit{len(keys)}}}"
+    exec(f"def _render(*, {params}):\n    return f\"{body}\"\n", ns)
+    return ns["_render"]
+
+
+@st.cache_resource
+def _table_template():
+    """
+    (HTML_TEMPLATE_TABLE with its <style> and <script> blocks minified, compiled renderer).
+    Streamlit re-runs this script on every interaction, so minifying + compiling is kept in
+    cache_resource and done once per process. Edit the readable HTML_TEMPLATE_TABLE, never the output.
+    """
+    html = _STYLE_BLOCK_RE.sub(
+        lambda m: m.group(1) + minify_css(m.group(2)) + m.group(3),
+        HTML_TEMPLATE_TABLE,
+    )
+    html = _SCRIPT_BLOCK_RE.sub(
+        lambda m: m.group(1) + minify_js(m.group(2)) + m.group(3),
+        html,
+    )
+    return html, _compile_table_template(html)
+
+
+def render_table_template(**kw) -> str:
+    """Fill the table template: render_table_template(TITLE=..., TABLE_ROWS=..., ...)."""
+    return _table_template()[1](**kw)
+
 # =========================================================
 # Generator
 # =========================================================
+# Patterns used per cell / per header are compiled once here.
+_RE_NON_NUMERIC = re.compile(r"[^0-9.\-]")
+_RE_WHITESPACE = re.compile(r"\s+")
+_RE_HAS_NON_NUMBER_CHARS = re.compile(r"[^\d\.\-\,\s]")
+_RE_COMMA_SPACE = re.compile(r"[,\s]")
+_RE_PLAIN_NUMBER = re.compile(r"-?\d+(\.\d+)?")
+_RE_MD_BOLD = re.compile(r"\*\*(.+?)\*\*")
+_RE_MD_ITALIC = re.compile(r"\*(.+?)\*")
+_RE_MD_HTML_RULES = (
+    # Bold + italic first, so ***text*** does not get split by later rules.
+    (re.compile(r"\*\*\*(.+?)\*\*\*", re.S), r"<strong><em>\1</em></strong>"),
+    (re.compile(r"___(.+?)___", re.S), r"<strong><em>\1</em></strong>"),
+    # Bold.
+    (re.compile(r"\*\*(.+?)\*\*", re.S), r"<strong>\1</strong>"),
+    (re.compile(r"__(.+?)__", re.S), r"<strong>\1</strong>"),
+    # Italic. The lookarounds stop this from catching leftover bold markers.
+    (re.compile(r"(?<!\*)\*(?!\*)(.+?)(?<!\*)\*(?!\*)", re.S), r"<em>\1</em>"),
+    (re.compile(r"(?<!_)_(?!_)(.+?)(?<!_)_(?!_)", re.S), r"<em>\1</em>"),
+)
+
+# Same output as html.escape(s, quote=True), but a single C-level pass per string.
+_HTML_ESC_TABLE = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#x27;"})
+
+
+def escape_html(s: str) -> str:
+    return str(s).translate(_HTML_ESC_TABLE)
+
+
 def guess_column_type(series: pd.Series) -> str:
     if pd.api.types.is_numeric_dtype(series):
         return "num"
-    sample = series.dropna().astype(str).head(20)
+    if pd.api.types.is_datetime64_any_dtype(series):
+        # ISO dates never survive the numeric-like check below; skip the string pass
+        return "text"
+
+    # First 20 non-null values. Look in a leading window first so huge columns are
+    # not copied in full by dropna(); only sparse columns fall back to the full scan.
+    sample = series.head(1000).dropna().head(20)
+    if len(sample) < 20 and len(series) > 1000:
+        sample = series.dropna().head(20)
+    sample = sample.astype(str)
     if sample.empty:
         return "text"
-    numeric_like = 0
-    for v in sample:
-        cleaned = re.sub(r"[^0-9.\-]", "", v)
-        try:
-            float(cleaned)
-            numeric_like += 1
-        except ValueError:
-            continue
+    # A value is numeric-like if it still parses as a float once everything but digits, "." and "-" is stripped
+    cleaned = sample.str.replace(_RE_NON_NUMERIC, "", regex=True)
+    numeric_like = int(pd.to_numeric(cleaned, errors="coerce").notna().sum())
     return "num" if numeric_like >= max(3, len(sample) // 2) else "text"
 
+
+def parse_number_series(series: pd.Series) -> pd.Series:
+    """Column-at-once parse_number: keep digits, "." and "-", parse as float, 0.0 where that fails."""
+    cleaned = series.astype(str).str.replace(_RE_NON_NUMERIC, "", regex=True)
+    return pd.to_numeric(cleaned, errors="coerce").fillna(0.0).astype(float)
+
 def format_column_header(col_name: str, mode: str) -> str:
     s = str(col_name or "")
     mode = (mode or "").strip().lower()
@@ -5313,7 +5977,7 @@ def format_column_header(col_name: str, mode: str) -> str:
         return s
 
     s2 = s.replace("_", " ").strip()
-    s2 = re.sub(r"\s+", " ", s2)
+    s2 = _RE_WHITESPACE.sub(" ", s2)
 
     if not s2:
         return s
@@ -5338,10 +6002,10 @@ def remove_markdown_formatting(text: str) -> str:
     s = str(text)
 
     # bold: **text**
-    s = re.sub(r"\*\*(.+?)\*\*", r"\1", s)
+    s = _RE_MD_BOLD.sub(r"\1", s)
 
     # italic: *text*
-    s = re.sub(r"\*(.+?)\*", r"\1", s)
+    s = _RE_MD_ITALIC.sub(r"\1", s)
 
     return s
 
@@ -5355,19 +6019,11 @@ def simple_markdown_to_html(text: str) -> str:
     - ***bold italic*** / ___bold italic___
     - line breaks
     """
-    escaped = html_mod.escape("" if text is None else str(text))
-
-    # Bold + italic first, so ***text*** does not get split by later rules.
-    escaped = re.sub(r"\*\*\*(.+?)\*\*\*", r"<strong><em>\1</em></strong>", escaped, flags=re.S)
-    escaped = re.sub(r"___(.+?)___", r"<strong><em>\1</em></strong>", escaped, flags=re.S)
-
-    # Bold.
-    escaped = re.sub(r"\*\*(.+?)\*\*", r"<strong>\1</strong>", escaped, flags=re.S)
-    escaped = re.sub(r"__(.+?)__", r"<strong>\1</strong>", escaped, flags=re.S)
+    escaped = escape_html("" if text is None else text)
 
-    # Italic. The lookarounds stop this from catching leftover bold markers.
-    escaped = re.sub(r"(?<!\*)\*(?!\*)(.+?)(?<!\*)\*(?!\*)", r"<em>\1</em>", escaped, flags=re.S)
-    escaped = re.sub(r"(?<!_)_(?!_)(.+?)(?<!_)_(?!_)", r"<em>\1</em>", escaped, flags=re.S)
+    # Rule order matters: see _RE_MD_HTML_RULES.
+    for pattern, repl in _RE_MD_HTML_RULES:
+        escaped = pattern.sub(repl, escaped)
 
     return escaped.replace("\n", "<br>")
 
@@ -5399,6 +6055,48 @@ def _bt_commit_footer_notes() -> None:
     st.session_state["bt_footer_notes"] = st.session_state.get("bt_footer_notes_draft", "")
 
 
+def _build_stripe_css(striped: bool, stripe_target_class: str, stripe_tone: str) -> str:
+    # Light = current behaviour: pale stripe + darker hover.
+    # Dark = use the current hover shade as the stripe + lighter hover.
+    shade = "linear-gradient(180deg,rgba(var(--brand-500-rgb),.16) 0%,rgba(var(--brand-500-rgb),.28) 100%)"
+    if stripe_tone == "dark":
+        css = f"#bt-block{{--row-stripe-bg:{shade};--row-hover-bg:var(--stripe)}}"
+    else:
+        css = f"#bt-block{{--row-stripe-bg:var(--stripe);--row-hover-bg:{shade}}}"
+
+    css += "#bt-block tbody tr:not(.dw-empty) td{background:#ffffff}"
+    if striped:
+        css += (
+            f"#bt-block tbody tr.{stripe_target_class} td{{background:var(--row-stripe-bg)}}"
+            f"#bt-block tbody tr:not(.dw-empty):not(.{stripe_target_class}) td{{background:#ffffff}}"
+        )
+    return css
+
+
+# Every stripe variant, built once. Rows carry dw-zebra-odd/even classes set by the page JS
+# (plain :nth-child would count rows hidden by search/paging), so only these rules vary.
+_STRIPE_CSS = {
+    (striped, target, tone): _build_stripe_css(striped, target, tone)
+    for striped in (True, False)
+    for target in ("dw-zebra-odd", "dw-zebra-even")
+    for tone in ("light", "dark")
+}
+
+
+def stripe_css_for(striped: bool, stripe_mode: str, stripe_tone: str) -> str:
+    target = "dw-zebra-even" if str(stripe_mode or "Odd").strip().lower() == "even" else "dw-zebra-odd"
+    tone = str(stripe_tone or "Light").strip().lower()
+    if tone not in {"light", "dark"}:
+        tone = "light"
+    return _STRIPE_CSS[(bool(striped), target, tone)]
+
+
+# Tables longer than this ship only their first DEFER_ROWS_EAGER rows as live DOM
+# (well over the largest page size); the rest is hydrated by the page script.
+DEFER_ROWS_MIN_TOTAL = 200
+DEFER_ROWS_EAGER = 100
+
+
 def generate_table_html_from_df(
     df: pd.DataFrame,
     title: str,
@@ -5442,30 +6140,22 @@ def generate_table_html_from_df(
     col_format_rules: dict | None = None,
 ) -> str:
 
-    df = df.copy()
+    # Read-only on df: nothing below mutates it, so no defensive copy of the whole frame.
     image_columns_set = set(str(c) for c in (image_columns or []) if str(c) in [str(x) for x in df.columns])
     if not image_columns_set:
         image_columns_set = set(str(c) for c in list(df.columns)[:5]) if len(df.columns) > 5 else set(str(c) for c in df.columns)
 
     # Dynamic heights based on row count
     row_count = len(df.index)
-    widget_height_cfg = {
-        "show_header": show_header,
-        "show_footer": show_footer,
-        "show_search": show_search,
-        "show_pager": show_pager,
-        "show_embed": show_embed,
-        "embed_position": embed_position,
-        "show_page_numbers": show_page_numbers,
-        "col_header_overrides": col_header_overrides or {},
-        "header_wrap_target": header_wrap_target,
-        "header_wrap_words": header_wrap_words,
-    }
-    widget_max_h = compute_preview_height(row_count, cfg=widget_height_cfg, df=df)
     table_max_h = compute_widget_table_max_height(row_count)
     bar_columns_set = set(bar_columns or [])
     bar_max_overrides = bar_max_overrides or {}
     heat_columns_set = set(heat_columns or [])
+
+    # Column types are inferred once; header, heat, wrap and per-cell decisions all read from here
+    col_types = {col: guess_column_type(df[col]) for col in df.columns}
+    bar_num_columns = {col for col in df.columns if col in bar_columns_set and col_types[col] == "num"}
+    heat_num_columns = {col for col in df.columns if col in heat_columns_set and col_types[col] == "num"}
     heat_overrides = heat_overrides or {}
 
     try:
@@ -5527,8 +6217,7 @@ def generate_table_html_from_df(
     def parse_number(v) -> float:
         try:
             s = "" if pd.isna(v) else str(v)
-            s = s.replace(",", "")
-            s = re.sub(r"[^0-9.\-]", "", s)
+            s = _RE_NON_NUMERIC.sub("", s)  # also drops thousands separators
             return float(s) if s else 0.0
         except Exception:
             return 0.0
@@ -5545,14 +6234,14 @@ def generate_table_html_from_df(
         s = str(raw_val).strip()
 
         # If it includes symbols/letters (%,$,etc) → do NOT reformat
-        if re.search(r"[^\d\.\-\,\s]", s):
+        if _RE_HAS_NON_NUMBER_CHARS.search(s):
             return s
 
         # Normalize commas/spaces
-        plain = re.sub(r"[,\s]", "", s)
+        plain = _RE_COMMA_SPACE.sub("", s)
 
         # Must be a plain number like -12 or 12.345
-        if not re.fullmatch(r"-?\d+(\.\d+)?", plain):
+        if not _RE_PLAIN_NUMBER.fullmatch(plain):
             return s
 
         try:
@@ -5679,6 +6368,14 @@ def generate_table_html_from_df(
             f"rgba(var(--brand-500-rgb), {alpha:.3f}));"
         )
 
+    # Parsed numbers per column, shared by bar max, heat min/max and the per-cell bar/heat values
+    parsed_numbers = {}
+
+    def numbers_of(col) -> pd.Series:
+        if col not in parsed_numbers:
+            parsed_numbers[col] = parse_number_series(df[col])
+        return parsed_numbers[col]
+
     # ✅ Pre-compute max for each selected bar column (with optional override)
     bar_max = {}
     for col in df.columns:
@@ -5695,7 +6392,7 @@ def generate_table_html_from_df(
                 pass
 
             try:
-                vals = df[col].apply(parse_number)
+                vals = numbers_of(col)
                 m = float(vals.max()) if len(vals) else 0.0
                 bar_max[col] = m if m > 0 else 1.0
             except Exception:
@@ -5704,13 +6401,13 @@ def generate_table_html_from_df(
     # ✅ Pre-compute min/max for heat columns (with optional overrides)
     heat_minmax = {}
     for col in df.columns:
-        if col in heat_columns_set and guess_column_type(df[col]) == "num":
+        if col in heat_num_columns:
             ov = heat_overrides.get(col, {}) or {}
             ov_min = ov.get("min", None)
             ov_max = ov.get("max", None)
 
             try:
-                vals = df[col].apply(parse_number)
+                vals = numbers_of(col)
                 auto_min = float(vals.min()) if len(vals) else 0.0
                 auto_max = float(vals.max()) if len(vals) else 0.0
             except Exception:
@@ -5739,7 +6436,7 @@ def generate_table_html_from_df(
     text_wrap_columns = set()
     keyword_hints = {"name", "city", "team", "player", "school", "market", "county", "country", "region", "title"}
     for col in df.columns:
-        if guess_column_type(df[col]) != "text":
+        if col_types[col] != "text":
             continue
 
         series = df[col].fillna("").astype(str).str.strip()
@@ -5754,7 +6451,7 @@ def generate_table_html_from_df(
     # ✅ Header
     head_cells = []
     for col in df.columns:
-        col_type = guess_column_type(df[col])
+        col_type = col_types[col]
         _ov = (col_header_overrides or {})
         _base_label = _ov.get(col, col)
         if header_style == "Keep original":
@@ -5776,9 +6473,9 @@ def generate_table_html_from_df(
         # Bracketed helper text is auto-styled smaller in the published widget.
         if should_wrap_header:
             wrapped_lines = wrap_text_by_words(display_col, wrap_words_for_col).splitlines()
-            safe_label_inner = "<br>".join(html_mod.escape(line) for line in wrapped_lines if line.strip())
+            safe_label_inner = "<br>".join(escape_html(line) for line in wrapped_lines if line.strip())
         else:
-            safe_label_inner = html_mod.escape(display_col)
+            safe_label_inner = escape_html(display_col)
         safe_label = f'<span class="dw-th-label"><span class="dw-th-main">{safe_label_inner}</span></span>'
 
         classes = []
@@ -5788,8 +6485,8 @@ def generate_table_html_from_df(
             classes.append("dw-text-col")
         class_attr = " ".join(classes)
         wrap_attr = f' data-header-wrap-words="{wrap_words_for_col}"' if should_wrap_header else ""
-        original_attr = html_mod.escape(display_col, quote=True)
-        data_col_attr = html_mod.escape(str(col), quote=True)
+        original_attr = escape_html(display_col)
+        data_col_attr = escape_html(str(col))
         export_image_attr = "1" if str(col) in image_columns_set else "0"
 
         head_cells.append(
@@ -5799,119 +6496,100 @@ def generate_table_html_from_df(
     table_head_html = "\n              ".join(head_cells)
 
     # ✅ Rows
-    row_html_snippets = []
-    for _, row in df.iterrows():
-        cells = []
-        for col in df.columns:
-            export_image_attr = ' data-export-image="1"' if str(col) in image_columns_set else ' data-export-image="0"'
-            raw_val = row[col]
-            display_val = format_numeric_for_display(raw_val, max_decimals=2)
-            display_val = apply_column_formatting(col, display_val, raw_val)
-            
-            safe_val = html_mod.escape(display_val)
-            safe_title = html_mod.escape(display_val, quote=True)
-
-            if col in bar_columns_set and guess_column_type(df[col]) == "num":
-                num_val = parse_number(row[col])
-                denom = bar_max.get(col, 1.0) or 1.0
-                pct_bar = max(0.0, min(100.0, (num_val / denom) * 100.0))
-
-                # ✅ Heat behind bars (only if this col is also selected for heat)
+    # Bar values and fill widths for every row, computed per column in one vectorized pass
+    bar_nums = {}
+    bar_pcts = {}
+    for col in bar_num_columns:
+        nums = numbers_of(col)
+        denom = bar_max.get(col, 1.0) or 1.0
+        bar_nums[col] = nums.tolist()
+        bar_pcts[col] = (nums / denom * 100.0).clip(0.0, 100.0).tolist()
+    heat_nums = {col: numbers_of(col).tolist() for col in heat_num_columns if col in heat_minmax}
+
+    # Display text for every cell, formatted and escaped a whole column at a time.
+    # escape_html quotes too, so the same string serves as cell text and title attribute.
+    columns = list(df.columns)
+    safe_columns = []
+    for col_i, col in enumerate(columns):
+        raw_vals = df.iloc[:, col_i].tolist()
+        if col_format_rules.get(col):
+            display_vals = [
+                apply_column_formatting(col, format_numeric_for_display(raw_val, max_decimals=2), raw_val)
+                for raw_val in raw_vals
+            ]
+        else:
+            # No rules: apply_column_formatting would only re-strip (and re-parse) each value
+            display_vals = [format_numeric_for_display(raw_val, max_decimals=2) for raw_val in raw_vals]
+        safe_columns.append(list(map(escape_html, display_vals)))
+
+    def heat_pct_alpha(num_val: float, mn: float, mx: float) -> tuple[float, float]:
+        pct = (num_val - mn) / (mx - mn)
+        pct = max(0.0, min(1.0, pct))
+
+        # optional curve: makes low values more visible
+        pct = pct ** 0.8
+
+        min_alpha = 0.12
+        return pct, min_alpha + (pct * (heat_strength - min_alpha))
+
+    # Complete <td> fragments, built a column at a time; rows are then just a join across columns
+    td_columns = []
+    for col, safe_col in zip(columns, safe_columns):
+        export_image_attr = ' data-export-image="1"' if str(col) in image_columns_set else ' data-export-image="0"'
+
+        if col in bar_num_columns:
+            # ✅ Heat behind bars (only if this col is also selected for heat)
+            bar_heat = heat_minmax.get(col) if col in heat_columns_set else None
+            tds = []
+            for safe_val, num_val, pct_bar in zip(safe_col, bar_nums[col], bar_pcts[col]):
                 td_class = "dw-bar-td"
                 td_style = ""
-
-                if col in heat_columns_set and col in heat_minmax:
-                    h_mn, h_mx = heat_minmax[col]
-                    h_pct = (num_val - h_mn) / (h_mx - h_mn)
-                    h_pct = max(0.0, min(1.0, h_pct))
-
-                    # optional curve: makes low values more visible
-                    h_pct = h_pct ** 0.8
-
-                    min_alpha = 0.12
-                    h_alpha = min_alpha + (h_pct * (heat_strength - min_alpha))
-
+                if bar_heat is not None:
+                    h_pct, h_alpha = heat_pct_alpha(num_val, *bar_heat)
                     td_class = "dw-bar-td dw-heat-td"
                     td_style = f' style="{heat_background_css(h_pct, h_alpha)}"'
 
-                cells.append(
-                    f"""
-                    <td class="{td_class}"{export_image_attr}{td_style}>
-                      <div class="dw-bar-wrap" title="{safe_title}">
-                        <div class="dw-bar-track">
-                          <div class="dw-bar-fill" style="width:{pct_bar:.2f}%;"></div>
-                          <div class="dw-bar-text">
-                            <span class="dw-bar-pill">{safe_val}</span>
-                          </div>
-                        </div>
-                      </div>
-                    </td>
-                    """
+                tds.append(
+                    f'<td class="{td_class}"{export_image_attr}{td_style}>'
+                    f'<div class="dw-bar-wrap" title="{safe_val}"><div class="dw-bar-track">'
+                    f'<div class="dw-bar-fill" style="width:{pct_bar:.2f}%;"></div>'
+                    f'<div class="dw-bar-text"><span class="dw-bar-pill">{safe_val}</span></div>'
+                    f'</div></div></td>'
                 )
 
-            elif col in heat_columns_set and guess_column_type(df[col]) == "num" and col in heat_minmax:
-                num_val = parse_number(row[col])
-                mn, mx = heat_minmax[col]
-                pct = (num_val - mn) / (mx - mn)
-                pct = max(0.0, min(1.0, pct))
-
-                # optional curve: makes low values more visible
-                pct = pct ** 0.8
-
-                min_alpha = 0.12
-                alpha = min_alpha + (pct * (heat_strength - min_alpha))
-
-                heat_style = heat_background_css(pct, alpha)
-
-                cells.append(
-                    f'<td class="dw-heat-td"{export_image_attr} style="{heat_style}"><div class="dw-cell" title="{safe_title}">{safe_val}</div></td>'
+        elif col in heat_num_columns and col in heat_minmax:
+            mn, mx = heat_minmax[col]
+            tds = []
+            for safe_val, num_val in zip(safe_col, heat_nums[col]):
+                heat_style = heat_background_css(*heat_pct_alpha(num_val, mn, mx))
+                tds.append(
+                    f'<td class="dw-heat-td"{export_image_attr} style="{heat_style}"><div class="dw-cell" title="{safe_val}">{safe_val}</div></td>'
                 )
 
-            else:
-                td_class = ' class="dw-text-col"' if col in text_wrap_columns else ""
-                cells.append(f'<td{td_class}{export_image_attr}><div class="dw-cell" title="{safe_title}">{safe_val}</div></td>')
-
-        row_html_snippets.append("            <tr>" + "".join(cells) + "</tr>")
-
-    table_rows_html = "\n".join(row_html_snippets)
+        else:
+            td_class = ' class="dw-text-col"' if col in text_wrap_columns else ""
+            td_open = f'<td{td_class}{export_image_attr}><div class="dw-cell" title="'
+            tds = [f'{td_open}{safe_val}">{safe_val}</div></td>' for safe_val in safe_col]
+
+        td_columns.append(tds)
+
+    row_html_snippets = ["<tr>" + "".join(cells) + "</tr>" for cells in zip(*td_columns)]
+
+    # Large tables: rows past the first screenful go in an inert <template> so the browser
+    # doesn't build and lay them out before first paint; the table script moves them in
+    # right after (or on first interaction).
+    if len(row_html_snippets) > DEFER_ROWS_MIN_TOTAL:
+        table_rows_html = (
+            "\n".join(row_html_snippets[:DEFER_ROWS_EAGER])
+            + '\n<template id="bt-rows-deferred">'
+            + "\n".join(row_html_snippets[DEFER_ROWS_EAGER:])
+            + "</template>"
+        )
+    else:
+        table_rows_html = "\n".join(row_html_snippets)
     colspan = str(len(df.columns))
 
-    stripe_mode_norm = str(stripe_mode or "Odd").strip().lower()
-    stripe_target_class = "dw-zebra-even" if stripe_mode_norm == "even" else "dw-zebra-odd"
-
-    stripe_tone_norm = str(stripe_tone or "Light").strip().lower()
-    if stripe_tone_norm not in {"light", "dark"}:
-        stripe_tone_norm = "light"
-
-    # Light = current behaviour: pale stripe + darker hover.
-    # Dark = use the current hover shade as the stripe + lighter hover.
-    row_colour_css = (
-        """
-    #bt-block{
-      --row-stripe-bg:linear-gradient(180deg, rgba(var(--brand-500-rgb), .16) 0%, rgba(var(--brand-500-rgb), .28) 100%);
-      --row-hover-bg:var(--stripe);
-    }
-    """
-        if stripe_tone_norm == "dark"
-        else """
-    #bt-block{
-      --row-stripe-bg:var(--stripe);
-      --row-hover-bg:linear-gradient(180deg, rgba(var(--brand-500-rgb), .16) 0%, rgba(var(--brand-500-rgb), .28) 100%);
-    }
-    """
-    )
-
-    stripe_css = (
-        row_colour_css + f"""
-    #bt-block tbody tr:not(.dw-empty) td{{ background:#ffffff; }} /* base */
-    #bt-block tbody tr.{stripe_target_class} td{{ background:var(--row-stripe-bg); }} /* striped */
-    #bt-block tbody tr:not(.dw-empty):not(.{stripe_target_class}) td{{ background:#ffffff; }} /* plain */
-    """
-        if striped
-        else row_colour_css + """
-    #bt-block tbody tr:not(.dw-empty) td{background:#ffffff;}
-    """
-    )
+    stripe_css = stripe_css_for(striped, stripe_mode, stripe_tone)
 
     header_class = "centered" if center_titles else ""
     title_class = "branded" if branded_title_color else ""
@@ -5970,42 +6648,41 @@ def generate_table_html_from_df(
     else:
         cell_align_class = "align-center"
 
-    html = (
-        HTML_TEMPLATE_TABLE
-        .replace("[[TABLE_HEAD]]", table_head_html)
-        .replace("[[TABLE_ROWS]]", table_rows_html)
-        .replace("[[COLSPAN]]", colspan)
-        .replace("[[TITLE]]", html_mod.escape(title_display))
-        .replace("[[SUBTITLE]]", subtitle_html)
-        .replace("[[BRAND_LOGO_URL]]", brand_logo_url)
-        .replace("[[BRAND_LOGO_ALT]]", html_mod.escape(brand_logo_alt))
-        .replace("[[BRAND_CLASS]]", brand_class or "")
-        .replace("[[STRIPE_CSS]]", stripe_css)
-        .replace("[[HEADER_ALIGN_CLASS]]", header_class)
-        .replace("[[TITLE_CLASS]]", title_class)
-        .replace("[[TITLE_FONT_SIZE]]", title_size_to_css(title_size))
-        .replace("[[HEADER_VIS_CLASS]]", header_vis)
-        .replace("[[FOOTER_VIS_CLASS]]", footer_vis)
-        .replace("[[EMBED_POSITION]]", embed_position)
-        .replace("[[CONTROLS_VIS_CLASS]]", controls_vis)
-        .replace("[[SEARCH_VIS_CLASS]]", search_vis)
-        .replace("[[PAGER_VIS_CLASS]]", pager_vis)
-        .replace("[[EMBED_VIS_CLASS]]", embed_vis)
-        .replace("[[PAGE_STATUS_VIS_CLASS]]", page_status_vis)
-        .replace("[[HEADER_EMBED_TARGET_VIS_CLASS]]", header_embed_target_vis)
-        .replace("[[BODY_EMBED_TARGET_VIS_CLASS]]", body_embed_target_vis)
-        .replace("[[FOOTER_EMBED_TARGET_VIS_CLASS]]", footer_embed_target_vis)
-        .replace("[[FOOTER_ALIGN_CLASS]]", footer_align_class)
-        .replace("[[FOOTER_EMBED_MODE_CLASS]]", "footer-with-embed" if footer_embed_active else "")
-        .replace("[[CELL_ALIGN_CLASS]]", cell_align_class)
-        .replace("[[BAR_FIXED_W]]", str(bar_fixed_w))
-        .replace("[[TABLE_MAX_H]]", str(table_max_h))
-        .replace("[[WIDGET_MAX_H]]", str(widget_max_h))
-        .replace("[[FOOTER_LOGO_H]]", str(footer_logo_h))
-        .replace("[[FOOTER_NOTES_VIS_CLASS]]", "" if (show_footer_notes and footer_notes_html) else "vi-hide")
-        .replace("[[FOOTER_NOTES_HTML]]", footer_notes_html)
-        .replace("[[FOOTER_SCALE_VIS_CLASS]]", "" if show_heat_scale else "vi-hide")
-        .replace("[[FOOTER_SCALE_HTML]]", footer_scale_html)
+    html = render_table_template(
+        TABLE_HEAD=table_head_html,
+        TABLE_ROWS=table_rows_html,
+        COLSPAN=colspan,
+        TITLE=escape_html(title_display),
+        SUBTITLE=subtitle_html,
+        BRAND_LOGO_URL=brand_logo_url,
+        BRAND_LOGO_ALT=escape_html(brand_logo_alt),
+        BRAND_CLASS=brand_class or "",
+        BRAND_PALETTE_CSS=BRAND_PALETTE_CSS.get(brand_class or "", ""),
+        STRIPE_CSS=stripe_css,
+        HEADER_ALIGN_CLASS=header_class,
+        TITLE_CLASS=title_class,
+        TITLE_FONT_SIZE=title_size_to_css(title_size),
+        HEADER_VIS_CLASS=header_vis,
+        FOOTER_VIS_CLASS=footer_vis,
+        EMBED_POSITION=embed_position,
+        CONTROLS_VIS_CLASS=controls_vis,
+        SEARCH_VIS_CLASS=search_vis,
+        PAGER_VIS_CLASS=pager_vis,
+        EMBED_VIS_CLASS=embed_vis,
+        PAGE_STATUS_VIS_CLASS=page_status_vis,
+        HEADER_EMBED_TARGET_VIS_CLASS=header_embed_target_vis,
+        BODY_EMBED_TARGET_VIS_CLASS=body_embed_target_vis,
+        FOOTER_EMBED_TARGET_VIS_CLASS=footer_embed_target_vis,
+        FOOTER_ALIGN_CLASS=footer_align_class,
+        FOOTER_EMBED_MODE_CLASS="footer-with-embed" if footer_embed_active else "",
+        CELL_ALIGN_CLASS=cell_align_class,
+        BAR_FIXED_W=str(bar_fixed_w),
+        TABLE_MAX_H=str(table_max_h),
+        FOOTER_LOGO_H=str(footer_logo_h),
+        FOOTER_NOTES_VIS_CLASS="" if (show_footer_notes and footer_notes_html) else "vi-hide",
+        FOOTER_NOTES_HTML=footer_notes_html,
+        FOOTER_SCALE_VIS_CLASS="" if show_heat_scale else "vi-hide",
+        FOOTER_SCALE_HTML=footer_scale_html,
     )
     return html
 
@@ -6014,8 +6691,45 @@ def generate_table_html_from_df(
 # UI Helpers
 # =========================================================
 def stable_config_hash(cfg: dict) -> str:
-    keys = sorted(cfg.keys())
-    return "|".join([f"{k}={repr(cfg.get(k))}" for k in keys])
+    # Fixed-size digest: it's compared on every rerun and embedded in the
+    # BT_PUBLISH_HASH comment, so it must not grow with (or echo) the config.
+    payload = json.dumps(cfg, sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def uploaded_df_hash() -> str:
+    """Content hash of bt_df_uploaded, recomputed only when that DataFrame is replaced.
+
+    Every edit path assigns a new frame to bt_df_uploaded, so the object identity
+    is enough to tell whether the O(rows x cols) hash needs redoing on a rerun.
+    """
+    df = st.session_state.get("bt_df_uploaded")
+    cached = st.session_state.get("bt_df_uploaded_hash")
+    if cached and cached[0] is df:
+        return cached[1]
+    try:
+        h = str(int(pd.util.hash_pandas_object(df, index=True).sum()))
+    except Exception:
+        h = repr((getattr(df, "shape", None), tuple(getattr(df, "columns", ()))))
+    st.session_state["bt_df_uploaded_hash"] = (df, h)
+    return h
+
+
+def table_html_key(cfg: dict, hidden_cols: list, col_format_rules: dict | None) -> str:
+    """Identity of html_from_config(bt_df_uploaded minus hidden_cols, cfg, col_format_rules)."""
+    rules_hash = stable_config_hash(col_format_rules or {})
+    return f"{stable_config_hash(cfg)}|{uploaded_df_hash()}|{tuple(hidden_cols)!r}|{rules_hash}"
+
+
+def uploaded_col_types() -> dict:
+    """guess_column_type for every column of bt_df_uploaded, cached the same way as uploaded_df_hash."""
+    df = st.session_state.get("bt_df_uploaded")
+    cached = st.session_state.get("bt_col_types")
+    if cached and cached[0] is df:
+        return cached[1]
+    types = {col: guess_column_type(df[col]) for col in df.columns}
+    st.session_state["bt_col_types"] = (df, types)
+    return types
 
 
 def simulate_progress(label: str, total_sleep: float = 0.35):
@@ -6161,7 +6875,7 @@ def build_publish_bundle(widget_file_name: str) -> dict:
         # high-level metadata
         "brand": st.session_state.get("brand_table", ""),
         "created_by": (st.session_state.get("bt_created_by_user", "") or "").strip().lower(),
-        "created_at_utc": datetime.datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC"),
+        "created_at_utc": datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC"),
 
         # naming + header text
         "table_name_words": st.session_state.get("bt_table_name_words", ""),
@@ -6465,14 +7179,14 @@ def read_github_text(owner: str, repo: str, token: str, path: str, branch: str =
         return ""
 
     url = f"{api_base}/repos/{owner}/{repo}/contents/{path}"
-    r = http_session().get(url, headers=headers, params={"ref": branch}, timeout=20)
+    r = http_session().get(url, headers=headers, params={"ref": branch}, timeout=GITHUB_TIMEOUT)
 
     if r.status_code == 404:
         return ""
     if r.status_code != 200:
         raise RuntimeError(f"Error reading text file: {r.status_code} {r.text}")
 
-    data = r.json() or {}
+    data = loads_json(r.content) or {}
     content_b64 = data.get("content", "")
     if not content_b64:
         return ""
@@ -6606,6 +7320,8 @@ def reset_widget_state_for_new_upload():
         "bt_widget_exists_locked",
         "bt_widget_name_locked_value",
         "bt_df_uploaded",
+        "bt_df_uploaded_hash",
+        "bt_col_types",
         "bt_df_confirmed",
         "bt_df_source",              # ✅ NEW
         "bt_allow_swap",
@@ -6975,7 +7691,8 @@ def do_confirm_snapshot():
 
     # ✅ Apply hidden columns to the confirmed snapshot
     hidden_cols = st.session_state.get("bt_hidden_cols", []) or []
-    df_confirm_for_html = st.session_state["bt_df_confirmed"].copy()
+    # Read-only for the generator; drop() below returns a new frame anyway
+    df_confirm_for_html = st.session_state["bt_df_confirmed"]
     if hidden_cols:
         df_confirm_for_html = df_confirm_for_html.drop(columns=hidden_cols, errors="ignore")
 
@@ -7002,11 +7719,15 @@ def do_confirm_snapshot():
     st.session_state["bt_confirmed_hash"] = stable_config_hash(cfg)
 
     live_rules = st.session_state.get("bt_col_format_rules", {})
-    html = html_from_config(
-        df_confirm_for_html,
-        st.session_state["bt_confirmed_cfg"],
-        col_format_rules=live_rules,
-    )
+    # ✅ Confirming what the live preview already shows: reuse its HTML instead of rebuilding it
+    if st.session_state.get("bt_preview_key") == table_html_key(cfg, hidden_cols, live_rules):
+        html = st.session_state.get("bt_preview_html", "")
+    else:
+        html = html_from_config(
+            df_confirm_for_html,
+            st.session_state["bt_confirmed_cfg"],
+            col_format_rules=live_rules,
+        )
 
     confirmed_total_height = compute_preview_height(
         len(df_confirm_for_html.index) if isinstance(df_confirm_for_html, pd.DataFrame) else 0,
@@ -7068,6 +7789,129 @@ def on_embed_position_change():
         st.session_state["bt_show_footer_notes"] = False
         st.session_state["bt_footer_logo_align"] = "Left"
 
+
+# Reruns on its own when only preview-local widgets change (image columns,
+# show/hide), instead of rerunning the whole app. Older Streamlit: plain call.
+_preview_fragment = getattr(st, "fragment", None) or (lambda fn: fn)
+
+
+@_preview_fragment
+def render_live_preview():
+    st.session_state.setdefault("bt_show_preview", True)
+
+    live_rules = st.session_state.get("bt_col_format_rules", {})
+
+    # Read-only here (the generator never mutates its input), so no copy per rerun
+    df_preview = st.session_state["bt_df_uploaded"]
+    hidden_cols = st.session_state.get("bt_hidden_cols", []) or []
+    if hidden_cols:
+        df_preview = df_preview.drop(columns=hidden_cols, errors="ignore")
+
+    # ✅ Preview PNG export columns should be editable before Confirm & Save.
+    # Downloading Top 10 / Bottom 10 from the live preview is unlimited and
+    # should not require saving/publishing each time.
+    preview_available_cols = [str(c) for c in df_preview.columns] if isinstance(df_preview, pd.DataFrame) else []
+    if preview_available_cols:
+        current_preview_cols = [
+            c for c in (st.session_state.get("bt_image_columns") or [])
+            if c in preview_available_cols
+        ]
+        if len(preview_available_cols) <= 5:
+            current_preview_cols = preview_available_cols
+        elif not current_preview_cols:
+            current_preview_cols = preview_available_cols[:5]
+        else:
+            current_preview_cols = current_preview_cols[:5]
+        st.session_state["bt_image_columns"] = current_preview_cols
+
+        if len(preview_available_cols) > 5:
+            with st.expander("🖼️ Image export columns", expanded=False):
+                st.caption(
+                    "Choose up to five columns for Top 10 / Bottom 10 PNG downloads. "
+                    "This is the only place you need to manage image columns; Confirm & Save will use the same selection."
+                )
+                preview_selected_cols = st.multiselect(
+                    "Columns for Top 10 / Bottom 10 images (max 5)",
+                    options=preview_available_cols,
+                    default=current_preview_cols,
+                    max_selections=5,
+                    key="bt_preview_image_columns_picker",
+                    help="Default is the first five visible columns. You can select fewer for a cleaner image.",
+                )
+
+                action_col1, action_col2 = st.columns([1, 1])
+                with action_col1:
+                    lock_cols_clicked = st.button(
+                        "Lock image columns",
+                        key="bt_lock_image_columns_btn",
+                        type="primary",
+                        use_container_width=True,
+                        disabled=len(preview_selected_cols) == 0,
+                    )
+                with action_col2:
+                    reset_cols_clicked = st.button(
+                        "Use first 5 columns",
+                        key="bt_reset_image_columns_btn",
+                        use_container_width=True,
+                    )
+
+                if reset_cols_clicked:
+                    st.session_state["bt_image_columns"] = preview_available_cols[:5]
+                    st.session_state["bt_image_columns_confirmed"] = preview_available_cols[:5]
+                    st.rerun()
+
+                if preview_selected_cols:
+                    st.session_state["bt_image_columns"] = preview_selected_cols[:5]
+                    st.caption(
+                        f"Selected {len(preview_selected_cols)} of 5 allowed. "
+                        "These columns will be used for preview downloads and saved image exports."
+                    )
+                else:
+                    st.warning("Select at least one column for image downloads.")
+                    st.session_state["bt_image_columns"] = preview_available_cols[:5]
+
+                if lock_cols_clicked and preview_selected_cols:
+                    st.session_state["bt_image_columns"] = preview_selected_cols[:5]
+                    st.session_state["bt_image_columns_confirmed"] = preview_selected_cols[:5]
+                    st.success("Image columns locked for Top 10 / Bottom 10 PNG exports.")
+
+    live_cfg = draft_config_from_state()
+    # ✅ Force the preview to include the Export menu so PNGs
+    # can be downloaded unlimited times without Confirm & Save.
+    live_cfg["show_embed"] = True
+    if str(live_cfg.get("embed_position", "Body") or "Body") not in ("Header", "Footer", "Body"):
+        live_cfg["embed_position"] = "Body"
+    live_cfg["image_columns"] = st.session_state.get("bt_image_columns", []) or []
+
+    preview_rows = len(df_preview.index) if isinstance(df_preview, pd.DataFrame) else 0
+    live_cfg = apply_compact_table_embed_guard(live_cfg, preview_rows)
+    preview_height = compute_preview_height(preview_rows, cfg=live_cfg, df=df_preview)
+    st.session_state["bt_preview_total_height"] = int(preview_height)
+
+    st.checkbox("Show live preview", key="bt_show_preview")
+
+    if not st.session_state["bt_show_preview"]:
+        st.info("Preview hidden for performance.")
+    else:
+        # Hash of the uploaded frame is reused across reruns; hidden
+        # columns are part of the key since df_preview drops them.
+        preview_key = table_html_key(live_cfg, hidden_cols, live_rules)
+
+        if st.session_state.get("bt_preview_key") != preview_key:
+            st.session_state["bt_preview_key"] = preview_key
+            st.session_state["bt_preview_html"] = html_from_config(
+                df_preview,
+                live_cfg,
+                col_format_rules=live_rules,
+            )
+
+        components.html(
+            st.session_state.get("bt_preview_html", ""),
+            height=preview_height,
+            scrolling=False,
+        )
+
+
 # =========================================================
 # Streamlit App
 # =========================================================
@@ -7219,7 +8063,7 @@ created_by_options = ["Select a user..."] + sorted(_user_passcodes.keys())
 def _validate_passcode(user: str, entered: str) -> bool:
     user = (user or "").strip().lower()
     entered = (entered or "").strip()
-    codes = _get_user_passcodes()
+    codes = _user_passcodes
     expected = codes.get(user, "")
     if not expected:
         return False
@@ -7412,7 +8256,7 @@ if main_tab == "Published Tables":
         # ✅ Only refetch when needed
         if refresh_clicked or "df_pub_cache" not in st.session_state or "Has CSV" not in st.session_state["df_pub_cache"].columns:
             if refresh_clicked:
-                st.cache_data.clear()
+                clear_published_data_caches()
             st.session_state["df_pub_cache"] = get_all_published_widgets(publish_owner, token_to_use)
 
         df_pub = st.session_state.get("df_pub_cache")
@@ -7721,7 +8565,7 @@ if main_tab == "Published Tables":
                     )
     
                     if do_it:
-                        expected = str(st.secrets.get("ADMIN_DELETE_CODE", "") or "")
+                        expected = ADMIN_DELETE_CODE
                         if not expected or not hmac.compare_digest(passkey, expected):
                             st.error("Wrong passkey.")
                             return
@@ -7757,7 +8601,7 @@ if main_tab == "Published Tables":
     
                         # Refresh list after deletes
                         try:
-                            st.cache_data.clear()
+                            clear_published_data_caches()
                         except Exception:
                             pass
                         st.session_state.pop("df_pub_cache", None)
@@ -8123,7 +8967,7 @@ if main_tab == "Published Tables":
             do_it = st.button("✅ Confirm delete", disabled=not (passkey and i_understand), type="primary")
     
             if do_it:
-                expected = str(st.secrets.get("ADMIN_DELETE_CODE", "") or "")
+                expected = ADMIN_DELETE_CODE
                 if not expected or not hmac.compare_digest(passkey, expected):
                     st.error("Wrong passkey.")
                     return
@@ -8150,7 +8994,7 @@ if main_tab == "Published Tables":
                 st.session_state.pop("pub_single_delete_target", None)
     
                 try:
-                    st.cache_data.clear()
+                    clear_published_data_caches()
                 except Exception:
                     pass
     
@@ -9211,7 +10055,7 @@ if main_tab == "Create New Table":
                                 if not isinstance(df_for_cols, pd.DataFrame) or df_for_cols.empty:
                                     st.info("Upload a CSV to enable bars.")
                                 else:
-                                    numeric_cols = [c for c in df_for_cols.columns if guess_column_type(df_for_cols[c]) == "num"]
+                                    numeric_cols = [c for c, t in uploaded_col_types().items() if t == "num"]
 
                                     if not numeric_cols:
                                         st.warning("No numeric columns found for bars.")
@@ -9274,7 +10118,7 @@ if main_tab == "Create New Table":
                                 if not isinstance(df_for_cols, pd.DataFrame) or df_for_cols.empty:
                                     st.info("Upload a CSV to enable heatmap.")
                                 else:
-                                    numeric_cols = [c for c in df_for_cols.columns if guess_column_type(df_for_cols[c]) == "num"]
+                                    numeric_cols = [c for c, t in uploaded_col_types().items() if t == "num"]
     
                                     if not numeric_cols:
                                         st.warning("No numeric columns found for heatmap.")
@@ -9590,16 +10434,6 @@ if main_tab == "Create New Table":
                                     except Exception:
                                         pass
 
-                                    upload_file_to_github(
-                                        publish_owner,
-                                        repo_name,
-                                        installation_token,
-                                        widget_file_name,
-                                        html_final,
-                                        f"Add/Update {widget_file_name} from Branded Table App",
-                                        branch="main",
-                                    )
-                                
                                     published_df = st.session_state.get("bt_df_confirmed")
                                     confirmed_cfg = st.session_state.get("bt_confirmed_cfg") or {}
                                     published_row_count = len(published_df.index) if isinstance(published_df, pd.DataFrame) else 0
@@ -9619,14 +10453,17 @@ if main_tab == "Create New Table":
                                     # ✅ NEW: also publish the editable bundle (CSV + config + rules)
                                     bundle = build_publish_bundle(widget_file_name)
                                     bundle_path = f"bundles/{widget_file_name}.json"
-                                
-                                    upload_file_to_github(
+
+                                    # ✅ Page + bundle land in ONE commit (one Pages build, no per-file sha probes)
+                                    upload_files_to_github(
                                         publish_owner,
                                         repo_name,
                                         installation_token,
-                                        bundle_path,
-                                        json.dumps(bundle, indent=2),
-                                        f"Add/Update bundle for {widget_file_name}",
+                                        [
+                                            (widget_file_name, html_final),
+                                            (bundle_path, dumps_json_pretty(bundle)),
+                                        ],
+                                        f"Add/Update {widget_file_name} + bundle from Branded Table App",
                                         branch="main",
                                     )
                                 
@@ -9636,7 +10473,7 @@ if main_tab == "Create New Table":
                                     st.session_state["bt_published_hash"] = st.session_state.get("bt_html_hash", "")
                                     st.session_state["bt_last_published_repo"] = repo_name
                                     st.session_state["bt_last_published_file"] = widget_file_name        
-                                    created_utc = datetime.datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC")
+                                    created_utc = datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
                                     # ✅ mark embed scripts as generated + fresh
                                     st.session_state["bt_embed_generated"] = True
                                     st.session_state["bt_embed_stale"] = False
@@ -9794,124 +10631,7 @@ if main_tab == "Create New Table":
                 # - Right view is "Preview"
                 if _left_view == "Customise table" and _right_view == "Preview":
                     with preview_slot:
-                        st.session_state.setdefault("bt_show_preview", True)
-
-                        live_rules = st.session_state.get("bt_col_format_rules", {})
-
-                        df_preview = st.session_state["bt_df_uploaded"].copy()
-                        hidden_cols = st.session_state.get("bt_hidden_cols", []) or []
-                        if hidden_cols:
-                            df_preview = df_preview.drop(columns=hidden_cols, errors="ignore")
-
-                        # ✅ Preview PNG export columns should be editable before Confirm & Save.
-                        # Downloading Top 10 / Bottom 10 from the live preview is unlimited and
-                        # should not require saving/publishing each time.
-                        preview_available_cols = [str(c) for c in df_preview.columns] if isinstance(df_preview, pd.DataFrame) else []
-                        if preview_available_cols:
-                            current_preview_cols = [
-                                c for c in (st.session_state.get("bt_image_columns") or [])
-                                if c in preview_available_cols
-                            ]
-                            if len(preview_available_cols) <= 5:
-                                current_preview_cols = preview_available_cols
-                            elif not current_preview_cols:
-                                current_preview_cols = preview_available_cols[:5]
-                            else:
-                                current_preview_cols = current_preview_cols[:5]
-                            st.session_state["bt_image_columns"] = current_preview_cols
-
-                            if len(preview_available_cols) > 5:
-                                with st.expander("🖼️ Image export columns", expanded=False):
-                                    st.caption(
-                                        "Choose up to five columns for Top 10 / Bottom 10 PNG downloads. "
-                                        "This is the only place you need to manage image columns; Confirm & Save will use the same selection."
-                                    )
-                                    preview_selected_cols = st.multiselect(
-                                        "Columns for Top 10 / Bottom 10 images (max 5)",
-                                        options=preview_available_cols,
-                                        default=current_preview_cols,
-                                        max_selections=5,
-                                        key="bt_preview_image_columns_picker",
-                                        help="Default is the first five visible columns. You can select fewer for a cleaner image.",
-                                    )
-
-                                    action_col1, action_col2 = st.columns([1, 1])
-                                    with action_col1:
-                                        lock_cols_clicked = st.button(
-                                            "Lock image columns",
-                                            key="bt_lock_image_columns_btn",
-                                            type="primary",
-                                            use_container_width=True,
-                                            disabled=len(preview_selected_cols) == 0,
-                                        )
-                                    with action_col2:
-                                        reset_cols_clicked = st.button(
-                                            "Use first 5 columns",
-                                            key="bt_reset_image_columns_btn",
-                                            use_container_width=True,
-                                        )
-
-                                    if reset_cols_clicked:
-                                        st.session_state["bt_image_columns"] = preview_available_cols[:5]
-                                        st.session_state["bt_image_columns_confirmed"] = preview_available_cols[:5]
-                                        st.rerun()
-
-                                    if preview_selected_cols:
-                                        st.session_state["bt_image_columns"] = preview_selected_cols[:5]
-                                        st.caption(
-                                            f"Selected {len(preview_selected_cols)} of 5 allowed. "
-                                            "These columns will be used for preview downloads and saved image exports."
-                                        )
-                                    else:
-                                        st.warning("Select at least one column for image downloads.")
-                                        st.session_state["bt_image_columns"] = preview_available_cols[:5]
-
-                                    if lock_cols_clicked and preview_selected_cols:
-                                        st.session_state["bt_image_columns"] = preview_selected_cols[:5]
-                                        st.session_state["bt_image_columns_confirmed"] = preview_selected_cols[:5]
-                                        st.success("Image columns locked for Top 10 / Bottom 10 PNG exports.")
-
-                        live_cfg = draft_config_from_state()
-                        # ✅ Force the preview to include the Export menu so PNGs
-                        # can be downloaded unlimited times without Confirm & Save.
-                        live_cfg["show_embed"] = True
-                        if str(live_cfg.get("embed_position", "Body") or "Body") not in ("Header", "Footer", "Body"):
-                            live_cfg["embed_position"] = "Body"
-                        live_cfg["image_columns"] = st.session_state.get("bt_image_columns", []) or []
-
-                        preview_rows = len(df_preview.index) if isinstance(df_preview, pd.DataFrame) else 0
-                        live_cfg = apply_compact_table_embed_guard(live_cfg, preview_rows)
-                        preview_height = compute_preview_height(preview_rows, cfg=live_cfg, df=df_preview)
-                        st.session_state["bt_preview_total_height"] = int(preview_height)
-
-                        st.checkbox("Show live preview", key="bt_show_preview")
-
-                        if not st.session_state["bt_show_preview"]:
-                            st.info("Preview hidden for performance.")
-                        else:
-                            cfg_hash = stable_config_hash(live_cfg)
-
-                            try:
-                                df_hash = int(pd.util.hash_pandas_object(df_preview, index=True).sum())
-                            except Exception:
-                                df_hash = hash((df_preview.shape, tuple(df_preview.columns)))
-
-                            rules_hash = hash(json.dumps(live_rules, sort_keys=True, default=str))
-                            preview_key = f"{cfg_hash}|{df_hash}|{rules_hash}"
-
-                            if st.session_state.get("bt_preview_key") != preview_key:
-                                st.session_state["bt_preview_key"] = preview_key
-                                st.session_state["bt_preview_html"] = html_from_config(
-                                    df_preview,
-                                    live_cfg,
-                                    col_format_rules=live_rules,
-                                )
-
-                            components.html(
-                                st.session_state.get("bt_preview_html", ""),
-                                height=preview_height,
-                                scrolling=False,
-                            )
+                        render_live_preview()
                 else:
                     # Clear any previously mounted preview so it does NOT persist visually
                     preview_slot.empty()